@@ -0,0 +1,7 @@
+"""
+Benchmarks of vaplac, run on synthetic data files with
+
+    python -m benchmarks
+
+from the root of the repository (see `python -m benchmarks --help`).
+"""
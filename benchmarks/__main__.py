@@ -0,0 +1,64 @@
+"""
+This module runs the benchmarks from the command line, e.g.
+
+    python -m benchmarks --rows 1e3 1e5 --save
+    python -m benchmarks --rows 1e3 1e5
+
+The first run saves its results as the baseline, to which the results
+of the following runs are compared. The exit status is 1 if a benchmark
+regressed or if importing vaplac.base exceeds its budget.
+
+"""
+
+import argparse
+import sys
+from os.path import dirname, exists, join
+
+from .suite import TOLERANCE, load, report, run, save
+
+BASELINE = join(dirname(__file__), 'baseline.json')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks',
+                                     description='Benchmark vaplac.')
+    parser.add_argument('--rows', nargs='+', default=['1e3', '1e5'],
+                        help='numbers of samples of the data files, '
+                             'from 1e3 to 1e7 (default: 1e3 1e5)')
+    parser.add_argument('--formats', nargs='+', default=['csv'],
+                        choices=['csv', 'xlsx'],
+                        help='formats of the data files (default: csv)')
+    parser.add_argument('--modes', nargs='+', default=['heating', 'cooling'],
+                        choices=['heating', 'cooling'],
+                        help='operating modes of the tests (default: both)')
+    parser.add_argument('--no-conditions', action='store_true',
+                        help='start the data files with their header')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='number of calls timed (default: 3)')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='do not measure the peak memory')
+    parser.add_argument('--data', help='directory of the data files '
+                        '(default: the cache directory of vaplac)')
+    parser.add_argument('--baseline', default=BASELINE,
+                        help='JSON file of the baseline results '
+                             '(default: benchmarks/baseline.json)')
+    parser.add_argument('--save', action='store_true',
+                        help='save the results as the baseline')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help='relative increase reported as a regression '
+                             f'(default: {TOLERANCE})')
+    args = parser.parse_args(argv)
+
+    results = run(rows=[int(float(n)) for n in args.rows],
+                  formats=args.formats, modes=args.modes,
+                  conditions=not args.no_conditions, repeat=args.repeat,
+                  memory=not args.no_memory, directory=args.data)
+    baseline = (load(args.baseline)
+                if exists(args.baseline) and not args.save else None)
+    ok = report(results, baseline, args.tolerance)
+    if args.save:
+        save(results, args.baseline)
+        print('Baseline saved to', args.baseline)
+    return 0 if ok else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,168 @@
+"""
+This module generates synthetic data files, shaped like the files of
+the data logger of the test bench, to benchmark vaplac on files of any
+size.
+
+The columns are those of the name conversion file, with values typical
+of a test in heating or cooling mode: each channel fluctuates around its
+mean, the outdoor temperatures follow a daily cycle, and the compressor
+stops regularly (e.g. for defrosting), the frequency being then logged
+as 'UnderRange'. The samples are one minute apart.
+
+Example
+-------
+>>> generate('heating.csv', 100000, mode='heating')
+>>> generate('cooling.xlsx', 10000, mode='cooling', conditions=None)
+
+"""
+
+import os
+from os.path import abspath, dirname, join, splitext
+import numpy as np
+import pandas as pd
+
+# Repository root, where the name conversion files are
+ROOT = dirname(dirname(abspath(__file__)))
+CONVERT_FILE = join(ROOT, 'name_conversions_UTF8.txt')
+
+# Test conditions written in the first line of the files
+CONDITIONS = 'load 50% | aux off | setpoint 20'
+
+# Mean value of each channel (in the units of the name conversion file)
+PROFILES = {
+    'heating': dict(
+        T1=5, T2=75, T3=70, T4=68, T5=45, T6=40, T7=3, T8=-1, T9=-2,
+        Ts=35, Tr=20, Tin=20, Tout=7, Tamb=18, Tdtk=22, RHs=17, RHr=45,
+        RHout=80, Tout_db=7, pin=800, pout=2800, flowrt_r=40, refdir=0,
+        Pa=700, Pb=700, Pfan_out=60, f=100, Pfan_in=0.1, Ptot=1.6),
+    'cooling': dict(
+        T1=7, T2=75, T3=10, T4=8, T5=10, T6=12, T7=40, T8=45, T9=70,
+        Ts=13, Tr=26, Tin=26, Tout=35, Tamb=25, Tdtk=24, RHs=90, RHr=50,
+        RHout=40, Tout_db=35, pin=900, pout=3000, flowrt_r=40, refdir=1,
+        Pa=750, Pb=750, Pfan_out=60, f=100, Pfan_in=0.1, Ptot=1.7),
+}
+
+# Standard deviation of the fluctuations, by unit
+NOISE = {'degC': 0.3, 'pct': 0.3, 'kPa': 5., 'g/s': 0.5, 'W': 5.,
+         'Hz': 0.5, 'kW': 0.01}
+
+# Channels following the daily cycle of the outdoor temperature, and its
+# amplitude in degC
+OUTDOOR = ('Tout', 'Tout_db', 'Tamb')
+DAILY_AMPLITUDE = 3.
+
+# Period of the compressor stops and their duration, in samples
+STOP_PERIOD = 360
+STOP_LENGTH = 10
+
+# Largest number of rows of an Excel sheet, header lines included
+EXCEL_ROWS = 2**20
+
+def _timestamps(start, stop):
+    """
+    Return the timestamps of samples start to stop, one minute apart,
+    as written by the data logger (e.g. '01/01/2020 00:00:00').
+    """
+    minutes = np.arange(start, stop)
+    days, minutes = np.divmod(minutes, 1440)
+    dates = pd.date_range('2020-01-01', periods=days[-1] - days[0] + 1,
+                          freq='D').strftime('%d/%m/%Y ').values
+    times = np.array([f'{m // 60:02d}:{m % 60:02d}:00' for m in range(1440)],
+                     dtype=object)
+    return dates[days - days[0]] + times[minutes]
+
+def _chunk(nconv, profile, start, stop, rng):
+    """Return rows start to stop of a synthetic file as a DataFrame."""
+    n = stop - start
+    i = np.arange(start, stop)
+    running = i % STOP_PERIOD >= STOP_LENGTH
+    daily = DAILY_AMPLITUDE * np.sin(2 * np.pi * i / 1440)
+    columns = {}
+    for short, name, units in zip(nconv.index, nconv['col_names'],
+                                  nconv['units']):
+        if short == 't':
+            columns[name] = _timestamps(start, stop)
+            continue
+        values = np.full(n, float(profile[short]))
+        if short != 'refdir':
+            values += rng.normal(0, NOISE.get(units, 0.01), n)
+        if short in OUTDOOR:
+            values += daily
+        if short in ('flowrt_r', 'Pa', 'Pb', 'Ptot'):
+            # No flow and a standby consumption when the compressor stops
+            values[~running] = rng.normal(0, 0.1, (~running).sum()) ** 2
+        values = values.round(3)
+        if short == 'f':
+            values = values.astype(object)
+            values[~running] = 'UnderRange'
+        columns[name] = values
+    return pd.DataFrame(columns)
+
+def generate(filename, rows, mode='heating', conditions=CONDITIONS, seed=0,
+             chunksize=100000, convert_file=CONVERT_FILE):
+    """
+    Write a synthetic data file.
+
+    Parameters
+    ----------
+    filename : str
+        The name of the file, whose extension (.csv or .xlsx) gives its
+        format.
+    rows : int
+        The number of samples. Excel files are limited to about 1e6
+        samples.
+    mode : {'heating', 'cooling'}, default 'heating'
+        The operating mode of the heat pump.
+    conditions : str, optional
+        The test conditions written in the first line of the file. If
+        None, the file starts with its header.
+    seed : int, default 0
+        The seed of the random fluctuations.
+    chunksize : int, default 100000
+        The number of rows generated and written at once.
+    convert_file : str, optional
+        The name conversion file giving the columns. Default is the
+        UTF-8 file of the repository.
+
+    Returns
+    -------
+    str
+        The name of the file.
+
+    """
+
+    from vaplac.base import read_name_converter
+
+    ext = splitext(filename)[1].lower()
+    if ext not in ('.csv', '.xlsx'):
+        raise ValueError('invalid file extension')
+    if ext == '.xlsx' and rows + 2 > EXCEL_ROWS:
+        raise ValueError(f'an Excel sheet holds at most {EXCEL_ROWS} rows')
+    nconv = read_name_converter(convert_file)
+    profile = PROFILES[mode]
+    rng = np.random.default_rng(seed)
+    chunks = (_chunk(nconv, profile, start, min(start + chunksize, rows), rng)
+              for start in range(0, rows, chunksize))
+
+    # Write to a temporary file, so that an interrupted run leaves no
+    # truncated file behind
+    tmp = f'{filename}.{os.getpid()}{ext}'
+    if ext == '.csv':
+        with open(tmp, 'w', encoding='utf8', newline='') as f:
+            if conditions is not None:
+                f.write(conditions + '\n')
+            for i, chunk in enumerate(chunks):
+                chunk.to_csv(f, header=i == 0, index=False)
+    else:
+        from openpyxl import Workbook
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        if conditions is not None:
+            sheet.append([conditions])
+        sheet.append(list(nconv['col_names']))
+        for chunk in chunks:
+            for row in chunk.itertuples(index=False):
+                sheet.append(row)
+        workbook.save(tmp)
+    os.replace(tmp, filename)
+    return filename
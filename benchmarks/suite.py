@@ -0,0 +1,358 @@
+"""
+This module implements the benchmarks of vaplac: the time and peak
+memory of the import of the package, of the reading of data files, of
+the computation of each quantity, of the data checks and of the plots,
+on synthetic files (see benchmarks.generate).
+
+The results of a run are compared with those of a baseline run, saved
+as a JSON file, to detect the changes that slow vaplac down or make it
+use more memory.
+
+Example
+-------
+>>> results = run(rows=(1000, 100000), formats=('csv',))
+>>> save(results, 'baseline.json')
+>>> report(run(rows=(1000, 100000)), load('baseline.json'))
+
+"""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from io import BytesIO
+from os.path import exists, join
+
+from .generate import CONDITIONS, CONVERT_FILE, ROOT, generate
+
+# Quantities computed in each operating mode
+QUANTITIES = {
+    'heating': 'Qcond Qev Pcomp Pel ws wr Tdps Tdpr Twbs Twbr has har '
+               'h1 h4 h6 h9',
+    'cooling': 'Qcond Qev Pcomp Qloss_ev Pel ws wr Tdps Tdpr Twbs Twbr '
+               'has har h1 h4 h7 h9',
+}
+
+# Quantities plotted
+PLOT = '(Tr Ts) f (pin pout) (Qcond Qev)'
+
+# Highest time to import the module holding DataTaker, in seconds, once
+# its unavoidable dependencies (IMPORT_PRELOAD) are imported, so that
+# the budget is met whatever the import time of pandas on the machine
+IMPORT_BUDGET = 0.1
+IMPORT_MODULE = 'vaplac.base'
+IMPORT_PRELOAD = ('numpy', 'pandas')
+
+# Relative increase of the time or of the peak memory reported as a
+# regression, unless the increase is below MIN_TIME (in seconds) or
+# MIN_MEMORY (in bytes)
+TOLERANCE = 0.25
+MIN_TIME = 0.005
+MIN_MEMORY = 2**20
+
+def measure(function, setup=None, repeat=3, memory=True):
+    """
+    Return the time and peak memory of a function.
+
+    Parameters
+    ----------
+    function : callable
+        The function benchmarked, called with the value returned by
+        `setup`, if given.
+    setup : callable, optional
+        Function called before each call of `function`, and not timed.
+    repeat : int, default 3
+        The number of calls timed, of which the fastest is kept.
+    memory : boolean, default True
+        If True, the function is called once more while tracing the
+        memory allocations (see tracemalloc).
+
+    Returns
+    -------
+    dict
+        The time in seconds ('time') and the peak of the memory
+        allocated in bytes ('peak', None if `memory` is False).
+
+    """
+
+    times = []
+    for _ in range(repeat):
+        args = () if setup is None else (setup(),)
+        start = time.perf_counter()
+        function(*args)
+        times.append(time.perf_counter() - start)
+    peak = None
+    if memory:
+        args = () if setup is None else (setup(),)
+        tracemalloc.start()
+        try:
+            function(*args)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return {'time': min(times), 'peak': peak}
+
+def import_time(module='vaplac', repeat=5, preload=()):
+    """
+    Return the time to import a module in a new interpreter, in s, the
+    modules of `preload` being imported beforehand.
+    """
+    code = ''.join(f'import {name}; ' for name in preload)
+    code += ('import time; start = time.perf_counter(); '
+             f'import {module}; print(time.perf_counter() - start)')
+    times = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', code], cwd=ROOT,
+                                capture_output=True, text=True, check=True)
+        times.append(float(output.stdout))
+    return min(times)
+
+def data_file(rows, format='csv', mode='heating', conditions=True,
+              directory=None):
+    """
+    Return the name of a synthetic data file, generated if it does not
+    exist yet.
+
+    The files are kept in `directory`, by default the 'benchmarks'
+    subdirectory of the cache directory of vaplac.
+    """
+    if directory is None:
+        from vaplac._cache import CACHE_DIR
+        directory = join(CACHE_DIR, 'benchmarks')
+    os.makedirs(directory, exist_ok=True)
+    filename = join(directory, f'{mode}-{rows}'
+                    + ('-conditions' if conditions else '') + f'.{format}')
+    if not exists(filename):
+        generate(filename, rows, mode=mode,
+                 conditions=CONDITIONS if conditions else None)
+    return filename
+
+def benchmark_file(filename, mode, repeat=3, memory=True):
+    """
+    Benchmark the processing of a data file.
+
+    Parameters
+    ----------
+    filename : str
+        The name of the data file.
+    mode : {'heating', 'cooling'}
+        The operating mode of the test.
+    repeat : int, default 3
+        The number of calls timed (see measure).
+    memory : boolean, default True
+        If True, the peak memory is measured (see measure).
+
+    Returns
+    -------
+    dict
+        The results (see measure), by name of benchmark: 'read',
+        'read_cached', 'get' (all the quantities of QUANTITIES), 'get/'
+        followed by the name of each node (alone, its inputs being
+        computed beforehand), 'check' and 'plot'.
+
+    """
+
+    import contextlib
+    from matplotlib.figure import Figure
+    from vaplac import DataTaker
+    from vaplac._cache import DataCache
+
+    def datataker(cache=False):
+        # The test conditions are printed when the file is read
+        with contextlib.redirect_stdout(None):
+            return DataTaker(filename, convert_file=CONVERT_FILE,
+                             cache=cache)
+
+    quantities = QUANTITIES[mode]
+    results = {}
+    bench = lambda name, *args: results.update(
+        {name: measure(*args, repeat=repeat, memory=memory)})
+
+    bench('read', datataker)
+    with tempfile.TemporaryDirectory() as directory:
+        cache = DataCache(directory)
+        datataker(cache)
+        bench('read_cached', lambda: datataker(cache))
+
+    # The refrigerant tables are built (or loaded) beforehand
+    datataker().get(quantities)
+    bench('get', lambda dtk: dtk.get(quantities), datataker)
+
+    # Each node alone, in order of evaluation, all its inputs being
+    # computed beforehand
+    dtk = datataker()
+    nodes = [name for name, _ in dtk.plan(quantities)]
+    for node in nodes:
+        def setup(node=node):
+            dtk.get(quantities)
+            dtk.invalidate(node)
+            return dtk
+        bench(f'get/{node}', lambda dtk, node=node: dtk._value(node), setup)
+
+    # The inputs of the checks are computed beforehand
+    dtk.check()
+    bench('check', lambda: dtk.check())
+
+    def plot():
+        fig = Figure()
+        dtk.plot(PLOT, fig=fig)
+        fig.savefig(BytesIO(), format='png')
+    bench('plot', plot)
+    return results
+
+def run(rows=(1000, 100000), formats=('csv',), modes=('heating', 'cooling'),
+        conditions=True, repeat=3, memory=True, directory=None,
+        verbose=True):
+    """
+    Run the benchmarks.
+
+    Parameters
+    ----------
+    rows : iterable of int, default (1000, 100000)
+        The numbers of samples of the data files.
+    formats : iterable of {'csv', 'xlsx'}, default ('csv',)
+        The formats of the data files.
+    modes : iterable of {'heating', 'cooling'}
+        The operating modes of the tests.
+    conditions : boolean, default True
+        If True, the data files start with the test conditions.
+    repeat : int, default 3
+        The number of calls timed (see measure).
+    memory : boolean, default True
+        If True, the peak memory is measured (see measure).
+    directory : str, optional
+        The directory of the data files (see data_file).
+    verbose : boolean, default True
+        If True, the name of each data file is printed before it is
+        benchmarked.
+
+    Returns
+    -------
+    dict
+        The results (see measure), by name of benchmark, prefixed by
+        the file it was run on (e.g. 'csv-100000-heating/read'). The
+        results 'import' and 'import/vaplac.base' hold the time to
+        import vaplac and its main module, the latter once the modules
+        of IMPORT_PRELOAD are imported.
+
+    """
+
+    results = {'import': {'time': import_time('vaplac'), 'peak': None},
+               f'import/{IMPORT_MODULE}': {
+                   'time': import_time(IMPORT_MODULE,
+                                       preload=IMPORT_PRELOAD),
+                   'peak': None}}
+    for n in rows:
+        for format in formats:
+            for mode in modes:
+                filename = data_file(n, format, mode, conditions, directory)
+                if verbose:
+                    print('Benchmarking', filename, file=sys.stderr)
+                prefix = f'{format}-{n}-{mode}'
+                for name, result in benchmark_file(filename, mode, repeat,
+                                                   memory).items():
+                    results[f'{prefix}/{name}'] = result
+    return results
+
+def save(results, filename):
+    """Save results to a JSON file, with a description of the system."""
+    import numpy as np
+    import pandas as pd
+    system = {'python': platform.python_version(), 'numpy': np.__version__,
+              'pandas': pd.__version__, 'machine': platform.machine(),
+              'processor': platform.processor(), 'date': time.ctime()}
+    with open(filename, 'w') as f:
+        json.dump({'system': system, 'results': results}, f, indent=1)
+
+def load(filename):
+    """Return the results saved in a JSON file (see save)."""
+    with open(filename) as f:
+        return json.load(f)['results']
+
+def _size(nbytes):
+    """Return a number of bytes in human-readable form."""
+    for unit in ('B', 'kiB', 'MiB'):
+        if abs(nbytes) < 1024:
+            return f'{nbytes:.0f} {unit}'
+        nbytes /= 1024
+    return f'{nbytes:.1f} GiB'
+
+def format_result(name, result, width=48):
+    """Return a line with the time and peak memory of a benchmark."""
+    peak = '' if result['peak'] is None else _size(result['peak'])
+    return f'{name:<{width}}{result["time"]*1e3:>11.2f} ms{peak:>12}'
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """
+    Compare results with those of a baseline run.
+
+    Parameters
+    ----------
+    results, baseline : dict
+        The results of the runs (see run).
+    tolerance : float, default TOLERANCE
+        The relative increase reported as a regression.
+
+    Returns
+    -------
+    list of tuple
+        For each benchmark of both runs, its name, the ratios of its
+        time and of its peak memory to those of the baseline (None if
+        not measured), and whether it regressed.
+
+    """
+
+    comparison = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        base = baseline[name]
+        time_ratio = result['time'] / base['time'] if base['time'] else None
+        regression = (result['time'] > base['time'] * (1 + tolerance)
+                      and result['time'] - base['time'] > MIN_TIME)
+        peak_ratio = None
+        if result['peak'] is not None and base['peak'] is not None:
+            if base['peak']:
+                peak_ratio = result['peak'] / base['peak']
+            regression |= (result['peak'] > base['peak'] * (1 + tolerance)
+                           and result['peak'] - base['peak'] > MIN_MEMORY)
+        comparison.append((name, time_ratio, peak_ratio, regression))
+    return comparison
+
+def report(results, baseline=None, tolerance=TOLERANCE):
+    """
+    Print the results, compared with a baseline run if given, and check
+    the import time of IMPORT_MODULE against IMPORT_BUDGET.
+
+    Returns
+    -------
+    boolean
+        True if no benchmark regressed and the import budget is met.
+
+    """
+
+    ratios = {} if baseline is None else {
+        name: (time_ratio, peak_ratio, regression)
+        for name, time_ratio, peak_ratio, regression
+        in compare(results, baseline, tolerance)}
+    fmt = lambda ratio: '' if ratio is None else f'x{ratio:.2f}'
+    ok = True
+    for name, result in results.items():
+        line = format_result(name, result)
+        if name in ratios:
+            time_ratio, peak_ratio, regression = ratios[name]
+            line += f'{fmt(time_ratio):>9}{fmt(peak_ratio):>9}'
+            if regression:
+                line += '  REGRESSION'
+                ok = False
+        print(line)
+    elapsed = results[f'import/{IMPORT_MODULE}']['time']
+    if elapsed > IMPORT_BUDGET:
+        print(f'import {IMPORT_MODULE} takes {elapsed*1e3:.0f} ms, over its '
+              f'budget of {IMPORT_BUDGET*1e3:.0f} ms')
+        ok = False
+    return ok
@@ -0,0 +1 @@
+"""Tests of vaplac, run with pytest from the root of the repository."""
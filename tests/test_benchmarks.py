@@ -0,0 +1,30 @@
+"""
+Tests of the comparison of benchmark runs (see benchmarks.suite).
+
+"""
+
+from benchmarks.suite import MIN_MEMORY, MIN_TIME, TOLERANCE, compare
+
+def test_compare_flags_regressions():
+    baseline = {'read': {'time': 1., 'peak': 100 * MIN_MEMORY},
+                'get': {'time': 1., 'peak': 100 * MIN_MEMORY},
+                'plot': {'time': 1., 'peak': None}}
+    results = {'read': {'time': 1 + 2 * TOLERANCE, 'peak': 100 * MIN_MEMORY},
+               'get': {'time': 1., 'peak': 200 * MIN_MEMORY},
+               'plot': {'time': 1., 'peak': None},
+               'check': {'time': 1., 'peak': None}}
+    comparison = {name: (time_ratio, peak_ratio, regression)
+                  for name, time_ratio, peak_ratio, regression
+                  in compare(results, baseline)}
+    # Only the benchmarks of both runs are compared
+    assert set(comparison) == {'read', 'get', 'plot'}
+    assert comparison['read'] == (1 + 2 * TOLERANCE, 1., True)
+    assert comparison['get'] == (1., 2., True)
+    assert comparison['plot'] == (1., None, False)
+
+def test_compare_ignores_small_changes():
+    # Relative increases below the absolute thresholds are noise
+    baseline = {'import': {'time': MIN_TIME / 10, 'peak': MIN_MEMORY // 10}}
+    results = {'import': {'time': MIN_TIME / 2, 'peak': MIN_MEMORY // 2}}
+    [(_, _, _, regression)] = compare(results, baseline)
+    assert not regression
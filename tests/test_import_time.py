@@ -0,0 +1,17 @@
+"""
+Test of the import-time budget of vaplac (see benchmarks.suite).
+
+"""
+
+from benchmarks.suite import (IMPORT_BUDGET, IMPORT_MODULE, IMPORT_PRELOAD,
+                              import_time)
+
+def test_import_budget():
+    elapsed = import_time(IMPORT_MODULE, preload=IMPORT_PRELOAD)
+    assert elapsed <= IMPORT_BUDGET, (
+        f'import {IMPORT_MODULE} takes {elapsed*1e3:.0f} ms, over its '
+        f'budget of {IMPORT_BUDGET*1e3:.0f} ms')
+
+def test_import_is_lazy():
+    # The public objects of vaplac are imported on first access
+    assert import_time('vaplac') <= IMPORT_BUDGET
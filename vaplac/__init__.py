@@ -1,4 +1,33 @@
-from .base import DataTaker
-from ._plot import plot
-from ._plot_files import plot_files
-from .movmean import movmean
+"""
+vaplac processes, validates and visualizes the data of heat pump tests.
+
+The submodules are imported when their objects are first used, so that
+importing vaplac is fast (e.g. in worker processes that never plot).
+"""
+
+import importlib
+
+# Module providing each public object
+_objects = {
+    'DataTaker': '.base',
+    'plot': '._plot',
+    'plot_files': '._plot_files',
+    'movmean': '.movmean',
+    'load_files': '.loader',
+    'DataTakerCollection': '.collection',
+    'render_files': '.render',
+    'Rolling': '.rolling',
+}
+
+__all__ = list(_objects)
+
+def __getattr__(name):
+    if name in _objects:
+        value = getattr(importlib.import_module(_objects[name], __name__),
+                        name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,343 @@
+"""
+This module implements the on-disk cache used by vaplac, in particular
+the DataCache class, to store the data parsed from data files, and the
+ResultCache class, to store results computed from them.
+
+"""
+
+import os
+from os.path import abspath, expanduser, getmtime, getsize, isdir, join
+import hashlib
+import json
+import shutil
+import time
+import numpy as np
+import pandas as pd
+
+# Version of the format of the entries of DataCache
+VERSION = 2
+
+# Directory where vaplac caches its files
+CACHE_DIR = os.environ.get('VAPLAC_CACHE',
+                           join(expanduser('~'), '.cache', 'vaplac'))
+
+def file_hash(filename, blocksize=2**20, content=None):
+    """
+    Return the BLAKE2 hash of the content of a file.
+
+    If the content of the file has already been read, it can be given as
+    bytes to avoid reading the file again.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    if content is not None:
+        h.update(content)
+        return h.hexdigest()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(blocksize), b''):
+            h.update(block)
+    return h.hexdigest()
+
+class DataCache():
+    """
+    Cache of parsed data files, stored column by column in binary files.
+
+    Each cached file has its own entry, that is a directory containing
+    one .npy file per column of each table parsed from the file, and a
+    metadata file. An entry is valid as long as the size and modification
+    time of the data file are unchanged, or, if only the modification
+    time differs, as long as its content hash is unchanged. Numerical
+    columns are memory-mapped when loaded (copy-on-write), so that
+    reopening a file only costs the reading of the columns that are
+    actually used. The files whose tables hold other objects than
+    numbers, dates and strings are not cached.
+
+    When the total size of the entries exceeds `max_size`, the least
+    recently used entries are evicted.
+
+    Parameters
+    ----------
+    directory : str, optional
+        The directory where the entries are stored. Default is the
+        'data' subdirectory of the VAPLAC_CACHE environment variable, or
+        of ~/.cache/vaplac.
+    max_size : int, default 2 GiB
+        Maximum size of the cache, in bytes.
+
+    Examples
+    --------
+    >>> cache = DataCache()
+    >>> cached = cache.load('test.csv')  # None if not cached
+    >>> if cached is None:
+    ...     data = pd.read_csv('test.csv')
+    ...     cache.store('test.csv', {'data': data}, info={'sep': ','})
+    ... else:
+    ...     data = cached[0]['data']
+
+    """
+
+    def __init__(self, directory=None, max_size=2*1024**3):
+        self.directory = (join(CACHE_DIR, 'data') if directory is None
+                          else directory)
+        self.max_size = max_size
+
+    def __repr__(self):
+        return f'DataCache({self.directory!r})'
+
+    def _entry(self, filename):
+        """Return the directory of the entry of a data file."""
+        key = hashlib.blake2b(abspath(filename).encode(),
+                              digest_size=16).hexdigest()
+        return join(self.directory, key)
+
+    def _read_meta(self, entry):
+        """Return the metadata of an entry, or None if it is invalid."""
+        try:
+            with open(join(entry, 'meta.json'), encoding='UTF8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, entry, meta):
+        """Write the metadata of an entry, atomically."""
+        tmp = join(entry, f'meta.json.{os.getpid()}')
+        with open(tmp, 'w', encoding='UTF8') as f:
+            json.dump(meta, f)
+        os.replace(tmp, join(entry, 'meta.json'))
+
+    def load(self, filename):
+        """
+        Return the cached data of a file.
+
+        Parameters
+        ----------
+        filename : str
+            The name of the data file.
+
+        Returns
+        -------
+        tuple (dict of DataFrame, dict) or None
+            The tables and the info dictionary given when they were
+            stored, or None if the file is not in the cache or has
+            changed.
+
+        """
+
+        entry = self._entry(filename)
+        meta = self._read_meta(entry)
+        if (meta is None or meta.get('version') != VERSION
+                or meta['size'] != getsize(filename)):
+            return None
+        mtime = getmtime(filename)
+        if meta['mtime'] != mtime:
+            # The file may have been touched without being modified
+            if meta['hash'] != file_hash(filename):
+                return None
+            meta['mtime'] = mtime
+
+        tables = {}
+        try:
+            for table, columns in meta['tables'].items():
+                arrays = {}
+                for i, (name, kind, missing) in enumerate(columns):
+                    array = np.load(join(entry, f'{table}-{i}.npy'),
+                                    mmap_mode=None if kind == 'O' else 'c')
+                    if kind == 'O':
+                        array = array.astype(object)
+                        if missing:
+                            na = np.load(join(entry, f'{table}-{i}-na.npy'))
+                            array[na] = np.nan
+                    arrays[name] = np.asarray(array)
+                tables[table] = pd.DataFrame(arrays, copy=False)
+        except (OSError, ValueError, KeyError):
+            return None
+
+        meta['atime'] = time.time()
+        try:
+            self._write_meta(entry, meta)
+        except OSError:
+            # The cache may be read-only
+            pass
+        return tables, meta['info']
+
+    def store(self, filename, data, info=None, content=None):
+        """
+        Store the data parsed from a file.
+
+        Parameters
+        ----------
+        filename : str
+            The name of the data file.
+        data : dict of DataFrame
+            The tables parsed from the file, by name.
+        info : dict, optional
+            JSON-serializable information stored along with the data.
+        content : bytes, optional
+            The content of the file, if it has already been read.
+
+        Nothing is stored if a column holds other objects than numbers,
+        dates and strings (or missing values).
+
+        """
+
+        # The data is only cached if all its columns can be stored
+        # without pickling and read back unchanged
+        for frame in data.values():
+            for name in frame:
+                column = frame[name]
+                if (not isinstance(column.dtype, np.dtype)
+                        or column.dtype.kind not in 'biufcmMO'):
+                    return
+                if (column.dtype.kind == 'O'
+                        and pd.api.types.infer_dtype(column, skipna=True)
+                        not in ('string', 'empty')):
+                    return
+
+        # Build the entry in a temporary directory moved into place once
+        # complete, so that processes storing the same file at the same
+        # time, or loading it meanwhile, never see a partial entry
+        entry = self._entry(filename)
+        tmp = f'{entry}.{os.getpid()}'
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        try:
+            tables, nbytes = {}, 0
+            for table, frame in data.items():
+                columns = []
+                for i, name in enumerate(frame):
+                    array = frame[name].values
+                    kind, missing = array.dtype.kind, False
+                    if kind == 'O':
+                        # Strings are stored as such, the missing values
+                        # being restored from a mask
+                        na = pd.isna(array)
+                        missing = bool(na.any())
+                        if missing:
+                            np.save(join(tmp, f'{table}-{i}-na.npy'), na)
+                            array = np.where(na, '', array)
+                        array = array.astype(str)
+                    np.save(join(tmp, f'{table}-{i}.npy'), array)
+                    columns.append((name, kind, missing))
+                    nbytes += array.nbytes
+                tables[table] = columns
+
+            self._write_meta(tmp, {
+                'version': VERSION,
+                'path': abspath(filename),
+                'size': getsize(filename),
+                'mtime': getmtime(filename),
+                'hash': file_hash(filename, content=content),
+                'tables': tables,
+                'nbytes': nbytes,
+                'atime': time.time(),
+                'info': {} if info is None else info,
+            })
+            shutil.rmtree(entry, ignore_errors=True)
+            try:
+                os.replace(tmp, entry)
+            except OSError:
+                # Another process has just stored the file
+                if self._read_meta(entry) is None:
+                    raise
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict()
+
+    def evict(self):
+        """Remove the least recently used entries exceeding max_size."""
+        if not isdir(self.directory):
+            return
+        entries = []
+        for key in os.listdir(self.directory):
+            entry = join(self.directory, key)
+            # Temporary directories are named after the entry and a pid
+            meta = None if '.' in key else self._read_meta(entry)
+            if meta is None:
+                # Leave alone the entries that may be being written
+                try:
+                    stale = time.time() - getmtime(entry) > 3600
+                except OSError:
+                    continue
+                if stale:
+                    shutil.rmtree(entry, ignore_errors=True)
+            else:
+                entries.append((meta['atime'], meta['nbytes'], entry))
+        size = sum(nbytes for _, nbytes, _ in entries)
+        for _, nbytes, entry in sorted(entries):
+            if size <= self.max_size:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            size -= nbytes
+
+    def clear(self):
+        """Remove all the entries of the cache."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+class ResultCache():
+    """
+    Cache of results computed from data files (e.g. summary statistics).
+
+    The results of a file are stored in a JSON file, by key, and remain
+    valid as long as the size and modification time of the data file
+    are unchanged.
+
+    Parameters
+    ----------
+    directory : str, optional
+        The directory where the results are stored. Default is the
+        'results' subdirectory of the VAPLAC_CACHE environment variable,
+        or of ~/.cache/vaplac.
+
+    Example
+    -------
+    >>> cache = ResultCache()
+    >>> results = cache.load('test.csv')  # {} if not cached
+    >>> if 'mean Qcond' not in results:
+    ...     cache.store('test.csv', {'mean Qcond': 7.64})
+
+    """
+
+    def __init__(self, directory=None):
+        self.directory = (join(CACHE_DIR, 'results') if directory is None
+                          else directory)
+
+    def __repr__(self):
+        return f'ResultCache({self.directory!r})'
+
+    def _entry(self, filename):
+        """Return the JSON file holding the results of a data file."""
+        key = hashlib.blake2b(abspath(filename).encode(),
+                              digest_size=16).hexdigest()
+        return join(self.directory, key + '.json')
+
+    def load(self, filename):
+        """
+        Return the cached results of a file, as a dictionary (empty if
+        there are none or if the file has changed).
+        """
+        try:
+            with open(self._entry(filename), encoding='UTF8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if (entry['size'] != getsize(filename)
+                or entry['mtime'] != getmtime(filename)):
+            return {}
+        return entry['results']
+
+    def store(self, filename, results):
+        """
+        Add results (a JSON-serializable dictionary) to those of a file.
+        """
+        entry = self._entry(filename)
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = f'{entry}.{os.getpid()}'
+        with open(tmp, 'w', encoding='UTF8') as f:
+            json.dump({'path': abspath(filename),
+                       'size': getsize(filename),
+                       'mtime': getmtime(filename),
+                       'results': {**self.load(filename), **results}}, f)
+        os.replace(tmp, entry)
+
+    def clear(self):
+        """Remove all the cached results."""
+        shutil.rmtree(self.directory, ignore_errors=True)
@@ -7,10 +7,15 @@ to easily produce formatted subplots from Quantity objects.
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
+from pandas.plotting import register_matplotlib_converters
+register_matplotlib_converters()
 import warnings
 
+from xpint import plot_line
+
 def plot(*args, time='min', step=60, interval=slice(0, None),
-         sharex='col', legend=True, lf=True, loc='best'):
+         sharex='col', legend=True, lf=True, loc='best', decimate=None,
+         fig=None):
     """
     Plot variables specified as arguments against time.
 
@@ -28,9 +33,11 @@ def plot(*args, time='min', step=60, interval=slice(0, None),
         (including datetime arrays).
     step : int or float
         The timestep between each measurement in seconds.
-    interval : slice, default slice(0, None)
+    interval : slice or list of slice, default slice(0, None)
         A slice object containing the range over which the quantities
-        are plotted.
+        are plotted. If a list of slices is given (e.g. the steady-state
+        periods, see DataTaker.steady_state), the samples outside of
+        them are hidden.
     sharex : bool or {'none', 'all', 'row', 'col'}, default 'col'
         Controls sharing of properties among x axis (see parameter
         `sharex` in `matplotlib.pyplot.subplots` function)
@@ -40,6 +47,21 @@ def plot(*args, time='min', step=60, interval=slice(0, None),
         When set to False, a legend frame is displayed.
     loc : int or string or pair of floats, default 'best'
         See `loc` parameter in `matplotlib.pyplot.legend`.
+    decimate : bool, optional
+        If True, only the minimum and maximum of the samples falling
+        within each pixel are drawn, and they are recomputed when
+        zooming or panning, so that long series are drawn quickly while
+        their peaks remain visible. By default, decimation is used for
+        the quantities longer than `xpint.DECIMATION_THRESHOLD`.
+    fig : matplotlib Figure, optional
+        The (empty) figure in which the subplots are created. By default,
+        a new pyplot figure is created. Giving a Figure created without
+        pyplot allows rendering figures without any display (see
+        vaplac.render_files).
+
+    Returns
+    -------
+    matplotlib Figure
 
     Examples
     --------
@@ -71,8 +93,26 @@ def plot(*args, time='min', step=60, interval=slice(0, None),
     t_str = isinstance(time, str)
 
     a0_list = isinstance(args[0], list)
-    length = len(args[0][0][interval] if a0_list else args[0][interval])
-    t = np.arange(0, length) / res[time] if t_str else time[interval]
+    length = len(args[0][0] if a0_list else args[0])
+    hidden = None
+    if isinstance(interval, list):
+        # Plot the span of the intervals, hiding the samples in between
+        shown = np.zeros(length, dtype=bool)
+        for segment in interval:
+            shown[segment] = True
+        index = np.flatnonzero(shown)
+        interval = (slice(index[0], index[-1] + 1) if len(index)
+                    else slice(0, 0))
+        hidden = ~shown[interval]
+    # Time of the samples in the interval, from the first sample
+    t = np.arange(0, length)[interval] / res[time] if t_str else time[interval]
+
+    def samples(q):
+        """Return the magnitude of the samples of q to be plotted."""
+        magnitude = q[interval].magnitude
+        if hidden is not None:
+            magnitude = np.where(hidden, np.nan, magnitude)
+        return magnitude
 
     warn_msg_dim = ('Quantities with different dimensionalities '
                     'are displayed on the same plot')
@@ -85,7 +125,10 @@ def plot(*args, time='min', step=60, interval=slice(0, None),
                  False:'time: {}     {}: {:.2f} {}'}[t_str]
 
     # Create the figure and axis.
-    fig, ax = plt.subplots(len(args), sharex=sharex, facecolor=(.93,.93,.93))
+    if fig is None:
+        fig = plt.figure()
+    fig.set_facecolor((.93,.93,.93))
+    ax = fig.subplots(len(args), sharex=sharex)
 
     def y_label(q, attr):
         """Create a y label for the quantity q."""
@@ -120,14 +163,15 @@ def plot(*args, time='min', step=60, interval=slice(0, None),
     if len(args) == 1:  # There is only one axis (that may have several plots).
 
         if not isinstance(args[0], list):  # There is only one plot.
-            ax.plot(t, args[0][interval].magnitude)
+            plot_line(ax, t, samples(args[0]), decimate)
             ax.set(ylabel=y_label(args[0], 'label'))
             # Label (or property) and units used in status bar
             sbdim, sbunit = args[0].prop, f'{args[0].units:~P}'
 
         else:  # There are several plots.
             for var in args[0]:
-                ax.plot(t, var[interval].magnitude, label=var.label)
+                plot_line(ax, t, samples(var), decimate,
+                          label=var.label)
 
                 if var.dimensionality != args[0][0].dimensionality:
                     warnings.warn(warn_msg_dim)
@@ -148,12 +192,13 @@ def plot(*args, time='min', step=60, interval=slice(0, None),
             # If var is not a list, there is only one variable
             # to be plotted in the current subplot.
             if not isinstance(var, list):
-                ax[i].plot(t, var[interval].magnitude)
+                plot_line(ax[i], t, samples(var), decimate)
                 ax[i].set(ylabel=y_label(var, 'label'))
                 sbdim, sbunit = var.prop, f'{var.units:~P}'
             else:
                 for var2 in var:
-                    ax[i].plot(t, var2[interval].magnitude, label=var2.label)
+                    plot_line(ax[i], t, samples(var2), decimate,
+                              label=var2.label)
 
                 if var2.dimensionality != var[0].dimensionality:
                     warnings.warn(warn_msg_dim)
@@ -171,4 +216,6 @@ def plot(*args, time='min', step=60, interval=slice(0, None),
                 return fmtr(x, y, sbdim, sbunit, ax[i])
             ax[i].format_coord = fmtri
 
-    plt.xlabel('$t$ (' + (time if t_str else 'timestamp') + ')');
+    np.atleast_1d(ax)[-1].set_xlabel(
+        '$t$ (' + (time if t_str else 'timestamp') + ')')
+    return fig
@@ -5,17 +5,17 @@ to plot a single quantity from several data files.
 """
 
 
-import numpy as np
+import warnings
 import pandas as pd
 import matplotlib.pyplot as plt
-from tkinter import Tk
-from tkinter.filedialog import askopenfilename, askopenfilenames
 from math import sqrt, floor
-from os.path import split
+from os import listdir
+from os.path import split, splitext, join
 
-from .base import DataTaker
+from .loader import load_files
 
-def plot_files(var, initialdir='./heating-data', paths=None, filetype=None):
+def plot_files(var, initialdir='./heating-data', paths=None, filetype=None,
+               workers=None):
     """
     Plot a single variable from several data files.
 
@@ -39,6 +39,9 @@ def plot_files(var, initialdir='./heating-data', paths=None, filetype=None):
         Extension of files to use for plotting (csv or excel). If not
         specified, files with both extension are used. Useful when
         `paths` is either 'all' or None.
+    workers : int, optional
+        The number of processes loading the files concurrently (see
+        vaplac.load_files). Default is the number of CPUs.
 
     """
 
@@ -54,23 +57,36 @@ def plot_files(var, initialdir='./heating-data', paths=None, filetype=None):
             filetypes = (('Excel', '.xlsx'), ('All files', '.*'))
 
         title = 'Select input files'
+        from tkinter import Tk
+        from tkinter.filedialog import askopenfilenames
         Tk().withdraw()  # remove tk window
         paths = askopenfilenames(initialdir=initialdir,
                                  title=title, filetypes=filetypes)
         if paths in ((), ''):  # Cancel button has been pressed
             return
 
-    elif paths == 'all':  # take every file in initialdir
-        paths = listdir(initialdir)
+    elif paths == 'all':  # take every data file in initialdir
+        if filetype is None:
+            extensions = ('.csv', '.xlsx')
+        elif filetype.lower() in ('csv', '.csv'):
+            extensions = ('.csv',)
+        else:
+            extensions = ('.xlsx',)
         # Use full path
-        paths = [initialdir + '/' + filename for filename in paths]
+        paths = [join(initialdir, filename)
+                 for filename in sorted(listdir(initialdir))
+                 if splitext(filename)[1].lower() in extensions]
 
     dfs=[]  # list to put the dataframes of each file
-    for path in paths:
-        quantity = DataTaker(filename=path).get(var)
+    for path, quantity in zip(paths, load_files(paths, var, workers)):
+        if quantity is None:  # the file could not be loaded
+            continue
         _, filename = split(path)  # get filename without the path
         dfs.append(pd.DataFrame(quantity.magnitude,
                                 columns=[var]).rename(columns={var:filename}))
+    if not dfs:
+        warnings.warn('no file could be loaded, nothing to plot')
+        return
     df = pd.concat(dfs, axis=1)  # merge all dataframes into one
 
     # Create the subplots layout
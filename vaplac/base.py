@@ -5,24 +5,218 @@ to process, validate and visualize data.
 """
 
 import platform
-from os.path import splitext, basename
+import time
+from os.path import splitext, basename, getsize, getmtime, abspath
 from itertools import groupby
-from tkinter import Tk
-from tkinter.filedialog import askopenfilename, askopenfilenames
+from functools import lru_cache
+from collections import namedtuple
 import re
+import ast
+import operator
+import csv
+import copy
+from io import BytesIO
 import numpy as np
 import pandas as pd
-from pandas.plotting import register_matplotlib_converters
-register_matplotlib_converters()
 from math import floor, sqrt
 
-from CoolProp.CoolProp import PropsSI as properties, PhaseSI as phase
-from CoolProp.HumidAirProp import HAPropsSI as psychro
-from cerberus import Validator
-
-from ._plot import plot
-from xpint import UnitRegistry
 from vaplac import sauroneye
+from .refrigerant import Refrigerant
+from ._cache import DataCache
+from .definitions import StatePoint, lookup
+from .stats import RunningStats
+
+# Number of bytes read to find the header and encoding of a file
+PREFIX_SIZE = 64 * 1024
+
+# Number of failing intervals of each check plotted by validate
+MAX_PLOTTED_INTERVALS = 3
+
+# Column of a data file: its name and position in the file (None if it
+# is missing), with the units, label and property of its quantity
+Channel = namedtuple('Channel', 'name position units label prop')
+
+# Name conversion tables already parsed, keyed by (path, mtime)
+_name_converters = {}
+
+def read_name_converter(filename):
+    """
+    Return the name conversion table of a file, parsed once per process
+    (and again if the file is modified).
+
+    Parameters
+    ----------
+    filename : str
+        The name of the name conversion file.
+
+    Returns
+    -------
+    DataFrame
+        The column name, label, property and units of each short name
+        (index). It is shared by all the DataTakers and must not be
+        modified.
+
+    """
+
+    key = (abspath(filename), getmtime(filename))
+    if key not in _name_converters:
+        nconv = pd.read_fwf(filename, comment='#',
+                            widths=[12, 36, 20, 20, 5], index_col=0)
+        nconv[nconv=='-'] = None
+        _name_converters[key] = nconv
+    return _name_converters[key]
+
+def parse_conditions(conditions):
+    """
+    Return the test conditions written in the first line of a file as a
+    dictionary.
+
+    The conditions are separated by '|', and each one is made of a name
+    followed by its value (e.g. 'load 50% | aux off').
+
+    Parameters
+    ----------
+    conditions : str or None
+        The first cell of the file, containing the test conditions.
+
+    Returns
+    -------
+    dict
+        The value of each condition (None if it has no value), or an
+        empty dictionary if there are no conditions.
+
+    Example
+    -------
+    >>> parse_conditions('load 50% | aux off | PdT')
+    {'load': '50%', 'aux': 'off', 'PdT': None}
+
+    """
+
+    parsed = {}
+    for condition in (conditions or '').split('|'):
+        name, *value = re.split(r'\s*[\s:=]\s*', condition.strip(), 1)
+        if name:
+            parsed[name] = value[0] if value else None
+    return parsed
+
+def apply_sentinels(data, sentinels):
+    """
+    Replace the sentinel values written by the data logger in place of
+    measurements (e.g. 'UnderRange') by numerical values.
+
+    The columns holding sentinels are converted to float, and a validity
+    mask flags the samples that are neither sentinels nor blanks.
+    Non-numerical columns (e.g. timestamps) are left unchanged.
+
+    Parameters
+    ----------
+    data : DataFrame
+        The data read from a file, modified in place.
+    sentinels : dict
+        The value replacing each sentinel, the empty string standing
+        for blank cells.
+
+    Returns
+    -------
+    DataFrame
+        Boolean DataFrame with the same columns as `data`, whose values
+        are False for sentinels and blanks.
+
+    Example
+    -------
+    >>> data = pd.DataFrame({'f': ['UnderRange', '98.5', 'OverRange']})
+    >>> valid = apply_sentinels(data, {'UnderRange': 0,
+    ...                                'OverRange': np.nan})
+    >>> data['f'].values, valid['f'].values
+    (array([ 0. , 98.5,  nan]), array([False,  True, False]))
+
+    """
+
+    validity = data.notna()
+    blank = sentinels.get('', np.nan)
+    for name in data:
+        column = data[name]
+        if column.dtype == object:
+            is_sentinel = column.isin([s for s in sentinels if s != ''])
+            numeric = pd.to_numeric(column.where(~is_sentinel),
+                                    errors='coerce')
+            # Leave non-numerical columns alone
+            if (numeric.isna() & column.notna() & ~is_sentinel).any():
+                continue
+            validity[name] = numeric.notna()
+            data[name] = numeric.where(~is_sentinel,
+                                       column.map(sentinels)).astype(float)
+        if column.dtype.kind in 'fO' and not np.isnan(blank):
+            data[name] = data[name].where(column.notna(), blank)
+    return validity
+
+@lru_cache(maxsize=None)
+def unit_registry():
+    """
+    Return the unit registry of the DataTaker class, built on first use
+    (building it takes longer than importing vaplac).
+    """
+    from xpint import UnitRegistry
+    from .quantity import Quantity
+    ureg = UnitRegistry(quantity_base=Quantity)
+    ureg.define('fraction = [] = frac = ratio')
+    ureg.define('percent = 1e-2 frac = pct')
+    ureg.define('ppm = 1e-6 fraction')
+    return ureg
+
+class _Registry():
+    """
+    Descriptor giving the unit registry (or its Quantity class if
+    `quantity` is True), built on first access.
+    """
+
+    def __init__(self, quantity=False):
+        self.quantity = quantity
+
+    def __get__(self, instance, owner):
+        ureg = unit_registry()
+        return ureg.Quantity if self.quantity else ureg
+
+def _read_only(value):
+    """
+    Return the value of a node with read-only arrays, so that the
+    quantities returned by DataTaker.get cannot modify the stored ones
+    (nor raw_data, which they may share their magnitude with).
+    """
+    if isinstance(value, StatePoint):
+        arrays = [np.asarray(array).view() for array in value]
+        for array in arrays:
+            array.flags.writeable = False
+        return StatePoint(*arrays)
+    if hasattr(value, 'readonly'):
+        return value.readonly()
+    return value
+
+def _extend(buffer, old, new):
+    """
+    Return the concatenation of two arrays, written to a buffer with
+    spare room after `old`, and the buffer.
+
+    The buffer is reused if it starts with `old` and has room for `new`,
+    otherwise a buffer twice as large as needed is allocated, so that
+    extending an array repeatedly costs, on average, the size of the
+    new samples only.
+    """
+    n = len(old) + len(new)
+    dtype = np.result_type(old, new)
+    if (buffer is None or len(buffer) < n or buffer.dtype != dtype
+            or old.__array_interface__['data'][0]
+            != buffer.__array_interface__['data'][0]):
+        buffer = np.empty((2 * n,) + old.shape[1:], dtype)
+        buffer[:len(old)] = old
+    buffer[len(old):n] = new
+    return buffer[:n], buffer
+
+# Operators allowed in the expressions evaluated by DataTaker.evaluate
+_OPERATORS = {ast.Add: operator.add, ast.Sub: operator.sub,
+              ast.Mult: operator.mul, ast.Div: operator.truediv,
+              ast.Pow: operator.pow, ast.USub: operator.neg,
+              ast.UAdd: operator.pos}
 
 class DataTaker():
     """
@@ -46,36 +240,126 @@ class DataTaker():
     ----------
     filename : str
         The name of the DataTaker file (.csv or .xlsx) to read.
+    exact : boolean, default False
+        If set to True, the refrigerant properties are computed exactly
+        with CoolProp instead of being interpolated in tables (see
+        vaplac.refrigerant for the accuracy of the tables).
+    cache : boolean or DataCache, default True
+        If True, the parsed data is stored in (and loaded from) the
+        default on-disk cache, so that reopening an unchanged file does
+        not parse it again. A DataCache object can also be given to use
+        another directory or size limit.
+    lazy : boolean, default False
+        If set to True, only the header of the file is read when the
+        DataTaker is created. The columns are then read from the file
+        when the quantities depending on them are first requested (by
+        the get or plot methods), so that the unused columns are never
+        loaded in memory.
+    sentinels : dict, optional
+        The numerical values (or NaN) replacing the sentinels written by
+        the data logger instead of measurements, by default those of the
+        `sentinels` class attribute. The empty string stands for blank
+        cells.
+    mode : {'heating', 'cooling'}, optional
+        The operating mode of the heat pump. If None is given, the mode
+        is that of the majority of the samples of refdir.
 
     Attributes
     ----------
     read_file : str
         The name of the data file that was read by the DataTaker.
+    raw_data : DataFrame
+        The data read from the file. In lazy mode, it only holds the
+        columns loaded so far.
+    conditions : dict
+        The test conditions given in the first line of the file, if any
+        (see parse_conditions).
+    validity : DataFrame
+        Boolean mask of the samples in raw_data that hold actual
+        measurements, i.e. that are neither sentinels nor blanks.
+    refrigerant : Refrigerant
+        The backend used to compute the refrigerant properties.
     """
 
-    ureg = UnitRegistry()
-    Q_ = ureg.Quantity
-    ureg.define('fraction = [] = frac = ratio')
-    ureg.define('percent = 1e-2 frac = pct')
-    ureg.define('ppm = 1e-6 fraction')
+    ureg = _Registry()
+    Q_ = _Registry(quantity=True)
+
+    # Default values replacing the sentinels of the data logger
+    sentinels = {'UnderRange': 0, 'OverRange': np.nan, '': np.nan}
 
     def __init__(self, filename=None, initialdir='heating-data',
-                 convert_file='name_conversions_UTF8.txt'):
+                 convert_file='name_conversions_UTF8.txt', exact=False,
+                 cache=True, lazy=False, sentinels=None, mode=None):
+        self._cache = DataCache() if cache is True else cache or None
+        if sentinels is not None:
+            self.sentinels = sentinels
+        self.mode = mode
+        self.lazy = lazy
+        # Rows appended by update, as (data, validity) pairs, added to
+        # raw_data and validity when they are accessed
+        self._appended = []
         # assign read_file and raw_data attribute
         self.read_file = self.read(filename, initialdir=initialdir)
         # assign _name_converter attribute
         if platform.system() == 'Windows':
             convert_file = 'name_conversions_ANSI.txt'
         self._build_name_converter(convert_file)
-        self.quantities = {}
+        self.refrigerant = Refrigerant('R410a', exact=exact)
+        # Values of the nodes computed so far (see vaplac.definitions),
+        # and the nodes computed from each node
+        self._values, self._dependants = {}, {}
+        # Accumulators kept up to date by update, keyed by
+        # (quantity, name)
+        self._trackers = {}
+        # Buffers the values of the nodes are appended to by update
+        self._buffers = {}
 
     def __repr__(self):
         return f'DataTaker({self.read_file})'
 
+    def _flush(self):
+        """Add the rows appended by update to raw_data and validity."""
+        if self._appended:
+            data, validity = zip(*self._appended)
+            self._raw_data = pd.concat([self._raw_data, *data])
+            self._validity = pd.concat([self._validity, *validity])
+            self._appended = []
+
+    @property
+    def raw_data(self):
+        """The data read from the file (see the class docstring)."""
+        self._flush()
+        return self._raw_data
+
+    @raw_data.setter
+    def raw_data(self, data):
+        self._flush()
+        self._raw_data = data
+        # The counts of refdir are those of the previous data
+        self._refdir = None
+
+    @property
+    def validity(self):
+        """The validity mask of raw_data (see the class docstring)."""
+        self._flush()
+        return self._validity
+
+    @validity.setter
+    def validity(self, validity):
+        self._flush()
+        self._validity = validity
+
+    @property
+    def quantities(self):
+        """Dictionary of the quantities computed so far, by name."""
+        return {name: value for name, value in self._values.items()
+                if isinstance(value, self.Q_)}
+
     def _build_name_converter(self, filename):
         """
         Create a DataFrame to get the actual columns names
-        in the DataTaker file.
+        in the DataTaker file, and the mapping from the short name of
+        each column to its name, position, units, label and property.
 
         Parameters
         ----------
@@ -84,11 +368,17 @@ class DataTaker():
 
         """
 
-        # Read the label conversion table differently according to the OS
-        nconv = pd.read_fwf(filename, comment='#',
-                            widths=[12, 36, 20, 20, 5], index_col=0)
-        nconv[nconv=='-'] = None
+        nconv = read_name_converter(filename)
         self._name_converter = nconv
+        header = getattr(self, '_source', {}).get('columns', ())
+        positions = {name: i for i, name in enumerate(header)}
+        self._columns = {
+            short: Channel(name, positions.get(name), units, label, prop)
+            for short, name, label, prop, units in zip(
+                nconv.index, nconv['col_names'], nconv['labels'],
+                nconv['properties'], nconv['units']
+            )
+        }
 
     def read(self, filename=None, initialdir='heating-data'):
         """
@@ -107,6 +397,8 @@ class DataTaker():
         """
 
         if filename is None:
+            from tkinter import Tk
+            from tkinter.filedialog import askopenfilename
             Tk().withdraw()  # remove tk window
             # Open dialog window in initialdir
             filetypes=(('All files', '.*'),
@@ -128,169 +420,344 @@ class DataTaker():
         else:
             raise ValueError('invalid file extension')
 
-        # Check the file encoding:
-        with open(filename, encoding='UTF8') as f:
+        # Use the cached data if the file has already been parsed
+        if self._cache is not None:
+            cached = self._cache.load(filename)
+            # The data is only valid for the same sentinel values
+            if (cached is not None
+                    and cached[1].get('sentinels') == repr(self.sentinels)):
+                tables, info = cached
+                self.raw_data = tables['raw_data']
+                self.validity = tables['validity']
+                # The source of the entry gives the end of the last
+                # complete line, where the update method resumes
+                self._source = {'filetype': filetype, 'filename': filename,
+                                'offset': getsize(filename),
+                                'columns': list(self.raw_data.columns),
+                                **info['source']}
+                self.conditions = parse_conditions(info['conditions'])
+                if info['conditions'] is not None:
+                    print('Test conditions :', info['conditions'])
+                return basename(filename)
+
+        # Read the bytes only once: the whole file, or a prefix holding
+        # the first lines of a CSV file in lazy mode
+        with open(filename, 'rb') as f:
+            lazy_csv = self.lazy and filetype == 'csv'
+            content = f.read(PREFIX_SIZE if lazy_csv else -1)
+
+        if filetype == 'csv':
+            # Check the file encoding on the first lines, without cutting
+            # a character in two
+            prefix = content[:PREFIX_SIZE]
+            if len(prefix) == PREFIX_SIZE:
+                prefix = prefix[:prefix.rfind(b'\n') + 1]
             try:
-                next(f)
+                prefix.decode('UTF8')
             except UnicodeDecodeError:
                 encoding = 'ISO-8859-1'
             else:
                 encoding = 'UTF8'
+            first_line = prefix.split(b'\n', 1)[0].decode(encoding)
+            first_cell = next(csv.reader([first_line]), [''])[0]
+        else:
+            encoding = None
+            # Parse the workbook only once, without header, which is
+            # found afterwards
+            sheet = pd.read_excel(BytesIO(content), header=None,
+                                  nrows=2 if self.lazy else None)
+            first_cell = str(sheet.iat[0, 0])
+
+        # Look for the test conditions in the first line
+        if any(word in first_cell for word in
+               ['load', 'aux', 'setpoint', '|', 'PdT']):
+            conditions = first_cell
+            print('Test conditions :', conditions)
+            # Skip the first row containing the conditions
+            skiprows = 1
+        else:
+            conditions = None
+            skiprows = None
+        self.conditions = parse_conditions(conditions)
+
+        # Keep what is needed to read the columns later on
+        self._source = {'filetype': filetype, 'filename': filename,
+                        'encoding': encoding, 'skiprows': skiprows,
+                        'offset': None if lazy_csv else len(content)}
+        if self.lazy:
+            # Only parse the header
+            if filetype == 'csv':
+                header = pd.read_csv(BytesIO(prefix), skiprows=skiprows,
+                                     nrows=0, encoding=encoding).columns
+            else:
+                header = sheet.iloc[skiprows or 0]
+            self._source['columns'] = list(header)
+            self.raw_data = pd.DataFrame()
+            self.validity = pd.DataFrame()
+            return basename(filename)
+
+        # Parse the data from the bytes already read
+        if filetype == 'csv':
+            # A last line that is not complete yet (the file being still
+            # written) is left for the update method
+            end = content.rfind(b'\n') + 1
+            self._source['offset'] = end
+            self.raw_data = pd.read_csv(BytesIO(content[:end]),
+                                        skiprows=skiprows, encoding=encoding)
+        else:
+            header = skiprows or 0
+            raw_data = sheet.iloc[header+1:].reset_index(drop=True)
+            raw_data.columns = list(sheet.iloc[header])
+            self.raw_data = raw_data.infer_objects()
+        self._source['columns'] = list(self.raw_data.columns)
+        self.validity = apply_sentinels(self.raw_data, self.sentinels)
+
+        if self._cache is not None:
+            source = {'encoding': encoding, 'skiprows': skiprows,
+                      'offset': self._source['offset']}
+            # The data is read anyway if it cannot be cached
+            try:
+                self._cache.store(filename, {'raw_data': self.raw_data,
+                                             'validity': self.validity},
+                                  content=content,
+                                  info={'conditions': conditions,
+                                        'source': source,
+                                        'sentinels': repr(self.sentinels)})
+            except OSError:
+                pass
 
-        # Define the reader function according to the file type
-        call = 'read_' + filetype
-        # Read the first line
-        raw_data = getattr(pd, call)(filename, nrows=0, encoding=encoding)
+        return basename(filename)
 
-        # Fetch the data
-        if any( word in list(raw_data)[0] for word in
-               ['load', 'aux', 'setpoint', '|', 'PdT'] ):
+    def _definition(self, name):
+        """Return the definition of a node (see vaplac.definitions)."""
+        return lookup(name, self._columns)
 
-            # Print the test conditions
-            print('Test conditions :', list(raw_data)[0])
+    def _inputs(self, definition, both=False):
+        """
+        Return the names of the inputs of a node.
 
-            # Skip the first row containing the conditions
-            self.raw_data = getattr(pd, call)(filename, skiprows=1,
-                                              encoding=encoding)
+        The inputs of a node depending on the operating mode are those of
+        the mode of the DataTaker, which is evaluated if needed, preceded
+        by 'heating' if the mode is not given. If `both` is True and the
+        mode is not given, the inputs of both modes are returned, without
+        evaluating anything (e.g. for chunks whose modes may differ).
+        """
+        if not definition.modal:
+            return definition.inputs
+        if self.mode is not None:
+            modes = [self.mode]
+        elif both:
+            modes = ['heating', 'cooling']
         else:
-            self.raw_data = getattr(pd, call)(filename, encoding=encoding)
+            modes = ['heating' if self._value('heating') else 'cooling']
+        inputs = [] if self.mode is not None else ['heating']
+        for mode in modes:
+            if mode in definition.inputs:
+                inputs.extend(definition.inputs[mode])
+            elif not both:
+                raise ValueError(f'{definition.name} is not defined in '
+                                 f'{mode} mode')
+        return tuple(dict.fromkeys(inputs))
+
+    def _plan(self, names):
+        """
+        Return the names of the nodes to compute to get the given ones,
+        in order of evaluation (the inputs of each node before it).
+        """
+        order, visiting = {}, set()
+        def visit(name):
+            if name in self._values or name in order:
+                return
+            if name in visiting:
+                raise ValueError(f'circular definition of {name}')
+            visiting.add(name)
+            for input_ in self._inputs(self._definition(name)):
+                visit(input_)
+            order[name] = None
+        for name in names:
+            visit(name)
+        return list(order)
+
+    def plan(self, variables):
+        """
+        Return the execution plan of the get method, i.e. the nodes that
+        it would compute, in order of evaluation.
 
-        return basename(filename)
+        The nodes already computed are left out. If the operating mode is
+        not given to the DataTaker, it is evaluated to know the inputs
+        of the nodes depending on it.
+
+        Parameters
+        ----------
+        variables : str
+            The quantities, as given to the get method.
+
+        Returns
+        -------
+        list of tuple
+            The name of each node, with the names of its inputs.
+
+        Example
+        -------
+        >>> dtk = vpa.DataTaker()
+        >>> dtk.plan('Qcond')
+        [('f', ()), ('flowrt_r', ('f',)), ('pout', ()), ('T4', ()),
+         ('state(pout, T4)', ('pout', 'T4')), ...,
+         ('Qcond', ('heating', 'flowrt_r', 'state(pout, T4)',
+                    'state(pout, T6)'))]
+
+        """
 
-    def _build_quantities(self, *quantities, update=True):
+        names = [variable.split('/', 1)[0] for variable in variables.split()]
+        return [(name, self._inputs(self._definition(name)))
+                for name in self._plan(names)]
+
+    def _evaluate(self, order):
+        """Compute nodes, given in order of evaluation (see _plan)."""
+        if self.lazy:
+            self._load_columns(column for name in order
+                               for column in self._definition(name).columns)
+        for name in order:
+            definition = self._definition(name)
+            inputs = self._inputs(definition)
+            values = [self._values[input_] for input_ in inputs
+                      if input_ != 'heating']
+            if definition.modal:
+                heating = (self.mode == 'heating' if self.mode is not None
+                           else self._values['heating'])
+                values.insert(0, heating)
+            self._values[name] = _read_only(definition.compute(self, *values))
+            for input_ in inputs:
+                self._dependants.setdefault(input_, set()).add(name)
+
+    def _value(self, name):
+        """Return the value of a node, computing it if needed."""
+        if name not in self._values:
+            self._evaluate(self._plan([name]))
+        return self._values[name]
+
+    def invalidate(self, *names):
         """
-        Add quantities to the DataTaker's quantities attribute,
-        optionally returning them as Quantity objects.
+        Remove computed quantities and all those computed from them, so
+        that they are computed again when requested (e.g. after
+        modifying raw_data).
 
         Parameters
         ----------
-        *quantities : {'T{1-9}', 'h{1-9}', 'Ts', 'Tr', 'Tin', 'Tout',
-                       'Tamb', 'Tdtk', 'RHout','Tout_db', 'pin', 'pout',
-                       'refdir', 'Pa', 'Pb', 'Pfan_out', 'f', 'Pfan_in',
-                       'Ptot', 'Qcond', 'Qev', 'Pcomp', 'flowrt_r'}
-        update : boolean, default True
-            If set to False, quantities already present will not be
-            replaced.
+        *names : str
+            The names of quantities, or of columns of the file (by their
+            short names), in which case the quantities reading them are
+            removed.
 
         Example
         -------
-        >>> dtk = vpa.DataTaker()
-        >>> quantities = ('T1', 'T2', 'T3')
-        >>> T1, T2, T3 = dtk._build_quantities(*quantities, update=False)
-
-        """
-
-        nconv = self._name_converter
-        stored_quantities = self.quantities.keys() if not update else {}
-        quantities = set(quantities) - set(stored_quantities)
-        # quantities are divided into 4 categories:
-        #   humidity ratios,
-        #   those whose magnitude require a bit of cleaning,
-        #   those depending upon other quantities to be computed,
-        #   and those that can be taken 'as is'.
-        hum_ratios = quantities.intersection({'ws', 'wr'})
-        to_clean = quantities.intersection({'f', 'flowrt_r'})
-        dependant = quantities.intersection(
-            {'Qcond', 'Qev', 'Pcomp', 'Pel', 'Qloss_ev'})
-        enthalpies = quantities.intersection({f'h{i+1}' for i in range(9)})
-        as_is = quantities - hum_ratios - to_clean - dependant - enthalpies
-
-        if enthalpies or dependant - {'Pel'}:
-            ref_dir = self.get('refdir')
-            # majority of 0 = heating, majority of 1 = cooling
-            heating = np.count_nonzero(ref_dir) < len(ref_dir) / 2
-
-        for w in hum_ratios:
-            T = self.get('T' + w.strip('w')).to('K').magnitude
-            RH = self.get('RH' + w.strip('w')).to('ratio').magnitude
-            self.quantities[w] = self.Q_(
-                psychro('W', 'P', 101325, 'T', T, 'RH', RH),
-                label='$\omega_{' + w.strip('w') + '}$',
-                prop='absolute humidity',
-                units='ratio'
-            ).to('g/kg')
-
-        if not update and 'flowrt_r' in to_clean:
-            # Since update is False, flowrt_r is not in self.quantities
-            self._build_quantities('flowrt_r', update=True)
-        elif to_clean:
-            f = self.raw_data[nconv.loc['f', 'col_names']].values
-            f[f == 'UnderRange'] = 0
-            f = f.astype(float) / 2 # actual compressor frequency
-            if 'f' in to_clean:
-                self.quantities['f'] = self.Q_(
-                    f,
-                    label=nconv.loc['f', 'labels'],
-                    prop=nconv.loc['f', 'properties'],
-                    units=nconv.loc['f', 'units']
-                )
-            if 'flowrt_r' in to_clean:
-                flowrt_r = self.raw_data[
-                    nconv.loc['flowrt_r', 'col_names']
-                ].values
-                flowrt_r[f == 0] = 0
-                self.quantities['flowrt_r'] = self.Q_(
-                    flowrt_r,
-                    label=nconv.loc['flowrt_r', 'labels'],
-                    prop=nconv.loc['flowrt_r', 'properties'],
-                    units=nconv.loc['flowrt_r', 'units']
-                )
-
-        for quantity in dependant - {'Pel'}:
-            if heating:
-                ref_states = {
-                    'Qcond': 'pout T4 pout T6',
-                    'Qev': 'pout T6 pin T9',
-                    'Pcomp': 'pin T1 pout T2'}[quantity]
-            else:
-                ref_states = {
-                    'Qcond': 'pout T9 pout T7',
-                    'Qev': 'pout T7 pin T4',
-                    'Pcomp': 'pin T1 pout T2',
-                    'Qloss_ev': 'pin T4 pin T1'}[quantity]
-            heat_params = self.get('flowrt_r ' + ref_states)
-            pow_kW = self._heat(quantity, *heat_params).to('kW')
-            self.quantities[quantity] = pow_kW
-
-        if 'Pel' in dependant:
-            Pel = np.add(*self.get('Pa Pb'))
-            self.quantities['Pel'] = self.Q_(Pel.magnitude,
-                                             label='$P_{el}$',
-                                             prop='electrical power',
-                                             units=Pel.units).to('kW')
-
-        for quantity in as_is:
-            magnitude = self.raw_data[nconv.loc[quantity, 'col_names']].values
-            self.quantities[quantity] = self.Q_(magnitude,
-                label=nconv.loc[quantity, 'labels'],
-                prop=nconv.loc[quantity, 'properties'],
-                units=nconv.loc[quantity, 'units'])
-
-        for enthalpy in enthalpies:
-            state = int(enthalpy.strip('h'))
-            if (heating and state in (7, 8, 9, 1) or
-                not heating and state in (6, 5, 4, 3, 1)):
-                pstate = 'in'
-            elif (heating and state in range(2, 7) or
-                  not heating and state in (2, 9, 8, 7)):
-                pstate = 'out'
-            else:
-                raise ValueError('The enthalpy state must be between 1 and 9.')
-            p, T = self.get(f'p{pstate} T{state}')
-            h = properties('H', 'P', p.to('Pa').magnitude,
-                           'T', T.to('K').magnitude, 'R410a')
-            self.quantities[enthalpy] = self.Q_(h,
-                                                label=f'$h_{state}$',
-                                                prop='enthalpy',
-                                                units='J/kg').to('kJ/kg')
+        >>> dtk.raw_data[col_name] = corrected_values
+        >>> dtk.invalidate('T4')  # Qcond and h4 will be computed again
+
+        """
+
+        names = set(names)
+        stack = [name for name in self._values if name in names
+                 or names.intersection(self._definition(name).columns)]
+        removed = set()
+        while stack:
+            name = stack.pop()
+            removed.add(name)
+            self._values.pop(name, None)
+            self._buffers.pop(name, None)
+            stack.extend(self._dependants.pop(name, ()))
+        # The accumulators of the removed quantities are created again
+        # when requested
+        self._trackers = {key: accumulator
+                          for key, accumulator in self._trackers.items()
+                          if key[0].split('/', 1)[0] not in removed}
+
+    def _requirements(self, quantities):
+        """
+        Return the columns of the file (by their short names) that are
+        needed to compute the given quantities.
+
+        Parameters
+        ----------
+        quantities : iterable of str
+            Names of quantities, as accepted by the get method.
+
+        Returns
+        -------
+        set of str
+
+        """
+
+        required, seen = set(), set()
+        stack = list(quantities)
+        while stack:
+            name = stack.pop()
+            if name in seen:
+                continue
+            seen.add(name)
+            definition = self._definition(name)
+            required.update(definition.columns)
+            # Both operating modes are covered if the mode is unknown
+            stack.extend(self._inputs(definition, both=True))
+        return required
+
+    def _positions(self, columns):
+        """
+        Return the positions in the file of columns given by their short
+        names, raising a ValueError if one of them is missing.
+        """
+        positions = []
+        for column in columns:
+            channel = self._columns[column]
+            if channel.position is None:
+                raise ValueError(f'column {channel.name!r} ({column}) not '
+                                 f'found in {self._source["filename"]}')
+            positions.append(channel.position)
+        return positions
+
+    def _load_columns(self, columns):
+        """
+        Read columns from the file and add them to raw_data.
+
+        Only the columns missing from raw_data are read, in one pass.
+
+        Parameters
+        ----------
+        columns : iterable of str
+            Short names of the columns (as in the name converter).
+
+        """
+
+        columns = self._positions(
+            column for column in dict.fromkeys(columns)
+            if self._columns[column].name not in self.raw_data
+        )
+        if not columns:
+            return
+        source = self._source
+        if source['filetype'] == 'csv':
+            data = pd.read_csv(source['filename'], usecols=columns,
+                               skiprows=source['skiprows'],
+                               encoding=source['encoding'])
+        else:
+            data = pd.read_excel(source['filename'], usecols=columns,
+                                 skiprows=source['skiprows'])
+        validity = apply_sentinels(data, self.sentinels)
+        if self.raw_data.empty:
+            self.raw_data, self.validity = data, validity
+        else:
+            self.raw_data = pd.concat([self.raw_data, data], axis=1)
+            self.validity = pd.concat([self.validity, validity], axis=1)
 
-    def get(self, variables):
+    def get(self, variables, interval=None):
         """
         Return specific quantities from a DataTaker as Quantity objects.
 
         All the specified quantities that are not yet in the DataTaker's
         quantities are added, then all the specified quantities are
-        returned in the form of Quantity objects.
+        returned in the form of Quantity objects. The quantities are
+        computed from their definitions (see vaplac.definitions), each
+        intermediate result being computed once (see the plan method).
 
         Parameters
         ----------
@@ -298,7 +765,12 @@ class DataTaker():
                      separated by spaces
                      {T1 T2 T3 T4 T5 T6 T7 T8 T9 Ts RHs ws Tr RHr wr Tin
                      Tout Tamb Tdtk f RHout Tout_db refdir flowrt_r pin
-                      pout Pa Pb Pfan_out Pfan_in Ptot Qcond Qev Pcomp}
+                      pout Pa Pb Pfan_out Pfan_in Ptot Qcond Qev Pcomp
+                      Tdps Tdpr Twbs Twbr has har}
+        interval : slice or list of slice, optional
+            Restricts the quantities to a range of samples, or to several
+            ranges put end to end (e.g. the steady-state periods given by
+            the steady_state method).
 
         Returns
         -------
@@ -312,6 +784,8 @@ class DataTaker():
         >>> properties = 'T1 T2 T3 T4 T5 T6 T7'
         >>> T1, T2, T3, T4, T5, T6, T7 = dtk.get(properties)
 
+        >>> Qcond = dtk.get('Qcond', interval=dtk.steady_state())
+
         """
 
         spec_units = {}
@@ -321,17 +795,347 @@ class DataTaker():
                 quantity, unit = variable.split('/', 1)
                 quantities[i] = quantity
                 spec_units[quantity] = unit
-        # Only build quantities not already in the DataTaker's quantities
-        self._build_quantities(*(set(quantities) - set(self.quantities)))
+        # Compute the missing quantities and the nodes they depend on
+        self._evaluate(self._plan(quantities))
         # Return a Quantity if there is only one element in quantities
-        def update_units(quantities, quantity):
-            return self.quantities[quantity].to(spec_units.get(quantity))
+        def update_units(quantity):
+            value = self._values[quantity].to(spec_units.get(quantity))
+            if isinstance(interval, list):
+                # Put the samples of the intervals end to end
+                index = np.arange(len(value))
+                return value[np.concatenate([index[segment]
+                                             for segment in interval]
+                                            or [index[:0]])]
+            return value if interval is None else value[interval]
         if len(quantities) > 1:
-            return (update_units(self.quantities, quantity)
-                    for quantity in quantities)
-            # return (self.quantities[quantity].to(spec_units.get(quantity)) for quantity in quantities)
+            return (update_units(quantity) for quantity in quantities)
         else:
-            return update_units(self.quantities, quantities[0])
+            return update_units(quantities[0])
+
+    def evaluate(self, expression):
+        """
+        Evaluate an arithmetic expression of quantities.
+
+        The expression may contain the names of quantities (as given to
+        the get method, without units), numbers, parentheses and the
+        operators +, -, *, / and **.
+
+        Parameters
+        ----------
+        expression : str
+            The expression, e.g. '(Qcond + Pfan_in) / Ptot'.
+
+        Returns
+        -------
+        xpint Quantity
+            The result, labelled with the expression. A dimensionless
+            result is expressed without units.
+
+        Example
+        -------
+        >>> dtk = vpa.DataTaker()
+        >>> COP = dtk.evaluate('Qcond / Pel')
+
+        """
+
+        def value(node):
+            """Evaluate a node of the syntax tree."""
+            if isinstance(node, ast.Expression):
+                return value(node.body)
+            if isinstance(node, ast.BinOp) and type(node.op) in _OPERATORS:
+                return _OPERATORS[type(node.op)](value(node.left),
+                                                 value(node.right))
+            if isinstance(node, ast.UnaryOp) and type(node.op) in _OPERATORS:
+                return _OPERATORS[type(node.op)](value(node.operand))
+            if isinstance(node, ast.Name):
+                return self.get(node.id)
+            if (isinstance(node, ast.Constant)
+                    and isinstance(node.value, (int, float))):
+                return node.value
+            raise ValueError(f'invalid expression: {expression!r}')
+
+        result = value(ast.parse(expression.strip(), mode='eval'))
+        if not isinstance(result, self.Q_):
+            raise ValueError(f'no quantity in expression: {expression!r}')
+        if result.dimensionless:
+            result = result.to('dimensionless')
+        return self.Q_(result.magnitude, result.units,
+                       label=expression.strip(), prop=result.prop)
+
+    def _subset(self, raw_data, validity):
+        """
+        Return a DataTaker with the same settings as this one, holding
+        other data (e.g. a chunk of the file).
+        """
+        dtk = copy.copy(self)
+        dtk._appended = []
+        dtk.raw_data, dtk.validity = raw_data, validity
+        dtk._values, dtk._dependants, dtk._trackers = {}, {}, {}
+        dtk._buffers = {}
+        dtk.lazy = False
+        return dtk
+
+    def track(self, variable, name, factory, quantity=None):
+        """
+        Return an accumulator fed with the samples of a quantity, that
+        the update method keeps up to date with the new rows.
+
+        The accumulator is created and fed with the whole quantity on the
+        first call, then returned as is on the following ones.
+
+        Parameters
+        ----------
+        variable : str
+            The quantity, as given to the get method (e.g. 'f/Hz').
+        name : str
+            The name of the accumulator, to tell apart those of a same
+            quantity.
+        factory : callable
+            Function returning a new accumulator, i.e. an object with an
+            update method taking a block of samples as a Quantity (e.g.
+            RunningStats or MovingMean).
+        quantity : xpint Quantity, optional
+            The whole quantity, if it has already been computed, fed to a
+            new accumulator instead of calling the get method (e.g. from
+            the threads of the checks, which must not compute quantities).
+
+        Example
+        -------
+        >>> moving = dtk.track('f', 'movmean15', lambda: MovingMean(15))
+        >>> moving.residuals.std
+
+        """
+
+        key = (variable, name)
+        if key not in self._trackers:
+            accumulator = factory()
+            accumulator.update(self.get(variable) if quantity is None
+                               else quantity)
+            self._trackers[key] = accumulator
+        return self._trackers[key]
+
+    def update(self):
+        """
+        Read the rows appended to the file since it was read, and extend
+        raw_data and the quantities already computed.
+
+        Only the new bytes are parsed, and the quantities are only
+        computed on the new rows and appended to buffers with spare room,
+        so that the cost of an update does not depend, on average, on the
+        length of the file. The new rows are only added to raw_data when
+        it is accessed. A last line that is not complete yet is left for
+        the next update.
+
+        If the operating mode is not given to the DataTaker and the
+        majority of refdir changes, the quantities depending on the mode
+        are invalidated, to be computed again when requested.
+
+        Returns
+        -------
+        int
+            The number of new rows.
+
+        Example
+        -------
+        >>> dtk = vpa.DataTaker('running-test.csv')
+        >>> Qcond = dtk.get('Qcond')
+        >>> dtk.update()  # some time later
+        >>> Qcond = dtk.get('Qcond')  # with the new rows
+
+        """
+
+        source = self._source
+        if source['filetype'] != 'csv' or source['offset'] is None:
+            raise ValueError('only CSV files read entirely (not in lazy '
+                             'mode) can be updated')
+        with open(source['filename'], 'rb') as f:
+            f.seek(source['offset'])
+            content = f.read()
+        # Leave the line being written for the next update
+        content = content[:content.rfind(b'\n') + 1]
+        if not content.strip():
+            return 0
+        source['offset'] += len(content)
+
+        n_old = (len(self._raw_data)
+                 + sum(len(data) for data, _ in self._appended))
+        data = pd.read_csv(BytesIO(content), header=None,
+                           names=source['columns'],
+                           encoding=source['encoding'])
+        data.index = pd.RangeIndex(n_old, n_old + len(data))
+        validity = apply_sentinels(data, self.sentinels)
+
+        new = self._subset(data, validity)
+        if 'heating' in self._values:
+            # The majority of refdir is counted incrementally
+            column = self._columns['refdir'].name
+            if self._refdir is None:
+                old = self.raw_data[column].values
+                self._refdir = [np.count_nonzero(old), len(old)]
+            ref_dir = data[column].values
+            self._refdir[0] += np.count_nonzero(ref_dir)
+            self._refdir[1] += len(ref_dir)
+            heating = self._refdir[0] < self._refdir[1] / 2
+            if heating != self._values['heating']:
+                self.invalidate('heating')
+            new.mode = 'heating' if heating else 'cooling'
+        self._appended.append((data, validity))
+
+        # Compute the nodes on the new rows only, and append them
+        for name, stored in list(self._values.items()):
+            if name == 'heating':
+                continue
+            value = new._value(name)
+            if isinstance(stored, StatePoint):
+                buffers = self._buffers.get(name, [None] * len(stored))
+                arrays = [_extend(*args) for args
+                          in zip(buffers, stored, value)]
+                value = StatePoint(*(array for array, _ in arrays))
+                self._buffers[name] = [buffer for _, buffer in arrays]
+            else:
+                magnitude, self._buffers[name] = _extend(
+                    self._buffers.get(name), np.asarray(stored.magnitude),
+                    np.asarray(value.to(stored.units).magnitude))
+                value = stored.__class__(magnitude, stored.units,
+                                         prop=stored.prop,
+                                         label=stored.label)
+            self._values[name] = _read_only(value)
+        for (variable, _), accumulator in self._trackers.items():
+            accumulator.update(new.get(variable))
+        return len(data)
+
+    def follow(self, interval=5, timeout=None):
+        """
+        Watch the file and update the DataTaker when rows are appended.
+
+        Parameters
+        ----------
+        interval : int or float, default 5
+            The time between two checks of the file, in seconds.
+        timeout : int or float, optional
+            Stop following the file when no rows have been appended for
+            that many seconds. By default, follow the file indefinitely.
+
+        Yields
+        ------
+        int
+            The number of new rows, after each update.
+
+        Example
+        -------
+        >>> dtk = vpa.DataTaker('running-test.csv')
+        >>> for n in dtk.follow(interval=60):
+        ...     dtk.validate()
+
+        """
+
+        last = time.monotonic()
+        while timeout is None or time.monotonic() - last < timeout:
+            n = self.update()
+            if n:
+                last = time.monotonic()
+                yield n
+            else:
+                time.sleep(interval)
+
+    def iter_chunks(self, variables, chunksize=100000):
+        """
+        Iterate over specific quantities, computed on successive chunks
+        of the file.
+
+        In lazy mode, the file is read chunk by chunk, and only the
+        columns needed by the quantities are read, so that files larger
+        than the memory can be processed. Otherwise, the chunks are taken
+        from raw_data.
+
+        Unless the operating mode is given to the DataTaker, the mode of
+        each chunk is that of the majority of its samples.
+
+        Parameters
+        ----------
+        variables : str
+            The quantities, as given to the get method.
+        chunksize : int, default 100000
+            The number of rows in each chunk.
+
+        Yields
+        ------
+        xpint Quantity or tuple of xpint Quantity objects
+            The quantities computed on the chunk.
+
+        Example
+        -------
+        >>> dtk = vpa.DataTaker('long-test.csv', lazy=True)
+        >>> for Qcond, Pel in dtk.iter_chunks('Qcond Pel'):
+        ...     print(Qcond.max(), Pel.max())
+
+        """
+
+        def output(dtk):
+            """
+            Return the quantities as get does, a single Quantity for a
+            single variable, and a tuple (rather than a generator) for
+            several.
+            """
+            quantities = dtk.get(variables)
+            return quantities if len(variables.split()) == 1 \
+                else tuple(quantities)
+
+        if not self.lazy:
+            for start in range(0, len(self.raw_data), chunksize):
+                rows = slice(start, start + chunksize)
+                yield output(self._subset(self.raw_data.iloc[rows],
+                                          self.validity.iloc[rows]))
+            return
+
+        source = self._source
+        if source['filetype'] != 'csv':
+            raise ValueError('only CSV files can be read by chunks')
+        names = [variable.split('/', 1)[0] for variable in variables.split()]
+        columns = self._positions(self._requirements(names))
+        reader = pd.read_csv(source['filename'], usecols=columns,
+                             skiprows=source['skiprows'],
+                             encoding=source['encoding'],
+                             chunksize=chunksize)
+        for data in reader:
+            validity = apply_sentinels(data, self.sentinels)
+            yield output(self._subset(data, validity))
+
+    def aggregate(self, variables, chunksize=100000):
+        """
+        Compute statistics of specific quantities chunk by chunk.
+
+        See the iter_chunks method, the memory used being proportional
+        to the chunk size and not to the length of the file.
+
+        Parameters
+        ----------
+        variables : str
+            The quantities, as given to the get method.
+        chunksize : int, default 100000
+            The number of rows in each chunk.
+
+        Returns
+        -------
+        dict of RunningStats
+            The statistics of each quantity (min, max, mean, std, sum and
+            integral over time).
+
+        Example
+        -------
+        >>> dtk = vpa.DataTaker('long-test.csv', lazy=True)
+        >>> stats = dtk.aggregate('Qcond Pel')
+        >>> stats['Pel'].integral(step=1).to('kWh')
+
+        """
+
+        names = [variable.split('/', 1)[0] for variable in variables.split()]
+        stats = {name: RunningStats() for name in names}
+        for chunk in self.iter_chunks(variables, chunksize):
+            chunk = (chunk,) if len(names) == 1 else chunk
+            for name, quantity in zip(names, chunk):
+                stats[name].update(quantity)
+        return stats
 
     def plot(self, quantities='all', timestamp=False, **kwargs):
         """
@@ -349,6 +1153,10 @@ class DataTaker():
             [] or {}.
         **kwargs : see function vaplac.plot.
 
+        Returns
+        -------
+        matplotlib Figure
+
         Example
         -------
         >>> dtk = vpa.DataTaker()
@@ -369,11 +1177,12 @@ class DataTaker():
         elif quantities == 'allmerge':
             def gen():
                 # Group quantities by property
-                key = lambda q: self.quantities[q].prop
-                for _, prop in groupby(sorted(self.quantities, key=key), key):
+                stored = self.quantities
+                key = lambda q: stored[q].prop
+                for _, prop in groupby(sorted(stored, key=key), key):
                     # Yield a list in any case, the appender will take
                     # care of the cases with only one element
-                    yield [self.quantities[q] for q in prop]
+                    yield [stored[q] for q in prop]
             iterator = gen()
             appender = lambda arg: arg[0] if len(arg) == 1 else arg
         elif any(delim in quantities for delim in ('(', '[', '{')):
@@ -402,37 +1211,31 @@ class DataTaker():
             args.append(appender(arg))
 
         if timestamp:
+            if self.lazy:
+                self._load_columns(['t'])
             # Take a minute resolution
             as_rounded_timestamp = lambda t: pd.Timestamp(t).round('min')
-            t = self.raw_data['Timestamp'].apply(as_rounded_timestamp)
+            t = self.raw_data[self._columns['t'].name].apply(
+                as_rounded_timestamp)
             kwargs['time'] = t
 
-        plot(*args, **kwargs)
+        from ._plot import plot
+        return plot(*args, **kwargs)
 
-    @ureg.wraps(None, (None, None, ureg.kilogram/ureg.second,
-                       ureg.pascal, ureg.kelvin, ureg.pascal, ureg.kelvin))
-    def _heat(self, power, flow=None,
-              pin=None, Tin=None, pout=None, Tout=None):
+    def _heat(self, power, flow, instate, outstate):
         """
         Compute heat transfer rate from thermodynamic quantities.
 
-        All provided quantities must be (x)pint Quantity objects, with a
-        magnitude of the same length.
-
         Parameters
         ----------
-        power : {'Qcond', 'Qev', 'Pcomp'}
+        power : {'Qcond', 'Qev', 'Pcomp', 'Qloss_ev'}
             Property to be evaluated.
         flow : Quantity
             The mass flow rate of the fluid exchanging heat or work.
-        pin : Quantity
-            Inlet fluid pressure.
-        Tin : Quantity
-            Inlet fluid temperature.
-        pout : Quantity
-            Outlet fluid pressure.
-        Tout : Quantity
-            Outlet fluid temperature.
+        instate : StatePoint
+            The inlet state of the refrigerant.
+        outstate : StatePoint
+            The outlet state of the refrigerant.
 
         Returns
         -------
@@ -442,16 +1245,9 @@ class DataTaker():
 
         """
 
-        # Get the enthalpies using CoolProp, in J/kg
-        hin = properties('H', 'P', pin, 'T', Tin, 'R410a')
-        hout = properties('H', 'P', pout, 'T', Tout, 'R410a')
-
-        # Check the phase, because points in and out may be
-        # on the wrong side of the saturation curve
-        phase_in = np.array([phase('P', p, 'T', T, 'R410a')
-                             for p, T in zip(pin, Tin)])
-        phase_out = np.array([phase('P', p, 'T', T, 'R410a')
-                              for p, T in zip(pout, Tout)])
+        # Get the inlet and outlet states, with enthalpies in J/kg
+        pin, _, hin, phase_in = instate
+        pout, _, hout, phase_out = outstate
 
         # Assign the expected phases based on the specified property
         exp_phase_in, exp_phase_out = {'Qcond': ('gas', 'liq'),
@@ -462,16 +1258,20 @@ class DataTaker():
         quality = {'liq':0, 'gas':1, None:None}
 
         # Replace by saturated state enthalpy if not in the right phase
-        if not exp_phase_in in phase_in:
-            hin[phase_in != exp_phase_in] = properties(
-                'H', 'P', pin[phase_in != exp_phase_in],
-                'Q', quality[exp_phase_in], 'R410a'
-            )
-        if not exp_phase_out in phase_out:
-            hout[phase_out != exp_phase_out] = properties(
-                'H', 'P', pout[phase_out != exp_phase_out],
-                'Q', quality[exp_phase_out], 'R410a'
-            )
+        # (only if no sample is in that phase), without altering the
+        # stored states. The phases are labelled as by PhaseSI, which
+        # never returns 'liq': the states expected to be liquid are
+        # thus always replaced by the saturated liquid
+        if exp_phase_in not in phase_in:
+            wrong_in = phase_in != exp_phase_in
+            hin = hin.copy()
+            hin[wrong_in] = self.refrigerant.saturated_enthalpy(
+                pin[wrong_in], quality[exp_phase_in])
+        if exp_phase_out not in phase_out:
+            wrong_out = phase_out != exp_phase_out
+            hout = hout.copy()
+            hout[wrong_out] = self.refrigerant.saturated_enthalpy(
+                pout[wrong_out], quality[exp_phase_out])
 
         # Get the right attributes depending on the input property
         label={'Qcond': '$\dot{Q}_{cond}$',
@@ -481,10 +1281,130 @@ class DataTaker():
         prop = 'mechanical power' if power == 'Pcomp' else 'heat transfer rate'
 
         # Return result in watts
+        flow = flow.to('kg/s').magnitude
         return self.Q_(flow * (hout - hin) * (-1 if power == 'Qcond' else 1),
                        label=label, units='W', prop=prop)
 
-    def validate(self, show_data=False):
+    def check(self, names=None, **options):
+        """
+        Perform data checks implemented in vaplac.sauroneye, and return
+        their detailed results.
+
+        Parameters
+        ----------
+        names : str or iterable of str, optional
+            The names of the checks (separated by spaces in a string).
+            Default is all the checks.
+        **options
+            The options of each check, by name of check (e.g.
+            `cycling_check={'window': 120}` to detect cycling over
+            windows of 120 samples, or `{'window': None}` to check the
+            whole file at once).
+
+        Returns
+        -------
+        list of sauroneye.CheckResult
+            For each check, its name, severity, the value of its metric,
+            the boolean mask of the samples at fault, the warning
+            message (None if the check passed) and the intervals
+            (slices) where it failed.
+
+        Example
+        -------
+        >>> dtk = vpa.DataTaker()
+        >>> for result in dtk.check():
+        ...     print(result.name, result.value, result.mask.sum())
+
+        """
+
+        if isinstance(names, str):
+            names = names.split()
+        return sauroneye.run_checks(self, names, options=options)
+
+    def describe(self, variables, percentiles=None, interval=None):
+        """
+        Return the descriptive statistics of several quantities.
+
+        The quantities are put side by side in a 2-D block, whose
+        statistics are computed column by column in a single pass (see
+        vaplac.stats.describe).
+
+        Parameters
+        ----------
+        variables : str
+            The quantities, separated by spaces, as given to the get method
+            (e.g. 'T1 T2 pout/MPa Qcond').
+        percentiles : iterable of float, optional
+            Percentages of the percentiles to compute, e.g. (5, 50, 95).
+        interval : slice or list of slice, optional
+            Restricts the statistics to a range of samples (see the get
+            method).
+
+        Returns
+        -------
+        pandas DataFrame
+            One row per quantity, with its units, its number of samples
+            and NaN values, its min, max, mean, standard deviation and
+            percentiles (in the units of the quantity).
+
+        Example
+        -------
+        >>> dtk.describe('Tr Ts f pout/MPa Qcond', percentiles=(5, 95))
+
+        """
+
+        from .stats import describe
+        names = [variable.split('/', 1)[0] for variable in variables.split()]
+        quantities = self.get(variables, interval)
+        quantities = [quantities] if len(names) == 1 else list(quantities)
+        block = np.column_stack([np.ravel(q.magnitude) for q in quantities])
+        summary = describe(block, percentiles)
+        table = pd.DataFrame({
+            'units': [f'{q.units:~P}' for q in quantities],
+            'count': summary.count, 'nans': summary.nans,
+            'min': summary.min, 'max': summary.max,
+            'mean': summary.mean, 'std': summary.std,
+            **{f'{p:g}%': value
+               for p, value in summary.percentiles.items()}
+        }, index=pd.Index(names, name='quantity'))
+        return table
+
+    def steady_state(self, channels=None, window=30, **kwargs):
+        """
+        Return the steady-state periods of the test.
+
+        A sample is steady when the standard deviation of each channel
+        over the window centered on it is within tolerance (see
+        vaplac.steady.steady_segments for all the parameters).
+
+        Parameters
+        ----------
+        channels : str, optional
+            The quantities that must be steady, separated by spaces.
+            Default is 'f Tr Ts pout Qcond'.
+        window : int, default 30
+            The number of samples in the windows.
+
+        Returns
+        -------
+        list of slice
+            The steady periods, as slices of the samples, to be given as
+            the `interval` of the get, plot and describe methods, or the
+            `index` of the info method of a quantity.
+
+        Example
+        -------
+        >>> segments = dtk.steady_state(tolerances={'Tr': '0.2 delta_degC'})
+        >>> Qcond, Pel = dtk.get('Qcond Pel', interval=segments)
+        >>> Qcond.mean() / Pel.mean()
+        >>> dtk.plot('Qcond', interval=segments[0])
+
+        """
+
+        from .steady import steady_segments
+        return steady_segments(self, channels, window, **kwargs)
+
+    def validate(self, show_data=False, verbose=True, **options):
         """
         Perform data checks implemented in vaplac.sauroneye.
 
@@ -495,7 +1415,18 @@ class DataTaker():
         ----------
         show_data : boolean, default False
             If set to True, the quantities involved in the checks resulting
-            in a warning are plotted.
+            in a warning are plotted over the intervals where they fail
+            (the first `MAX_PLOTTED_INTERVALS` of each check).
+        verbose : boolean, default True
+            If set to False, nothing is displayed.
+        **options
+            The options of each check, by name of check (see the check
+            method).
+
+        Returns
+        -------
+        list of str
+            The warnings.
 
         Example
         -------
@@ -503,22 +1434,24 @@ class DataTaker():
         >>> dtk.validate(show_data=True)
 
         """
-        schema = {check: {'check_with': getattr(sauroneye, check)}
-                  for check in dir(sauroneye) if check.endswith('check')}
-        v = Validator(schema)
-        if v.validate({check: self for check in schema}):
-            print('No warnings')
-        else:
-            n_warn = len(v.errors)
-            if n_warn > 1:
-                print(f'There are {n_warn} warnings:')
-                for i, warning in enumerate(v.errors.values()):
-                    print(' ', i+1, warning[0])
+
+        failed = [result for result in self.check(**options)
+                  if result.message is not None]
+        if not failed:
+            if verbose:
+                print('No warnings')
+        elif verbose:
+            if len(failed) > 1:
+                print(f'There are {len(failed)} warnings:')
+                for i, result in enumerate(failed):
+                    print(' ', i+1, result.message)
             else:
-                warn = list(v.errors.values())[0][0]
+                warn = failed[0].message
                 print('Warning:', warn[0].lower() + warn[1:] if warn else warn)
 
-            if show_data:
-                checkargs = sauroneye._checkargs
-                args = ' '.join(checkargs[check] for check in v.errors)
-                self.plot(args)
+        if show_data:
+            for result in failed:
+                quantities = sauroneye.CHECKS[result.name].plot
+                for interval in result.intervals[:MAX_PLOTTED_INTERVALS]:
+                    self.plot(quantities, interval=interval)
+        return [result.message for result in failed]
@@ -0,0 +1,225 @@
+"""
+This module provides the DataTakerCollection class, to analyse several
+data files (e.g. a whole test campaign) at once.
+
+"""
+
+import warnings
+from os import listdir
+from os.path import isdir, join, splitext, basename
+import pandas as pd
+
+from .base import DataTaker
+from ._cache import ResultCache
+from .loader import map_files
+from .render import render_files
+from .stats import RunningStats
+
+# Statistics computed for each expression, as columns of the summary
+STATISTICS = ('count', 'mean', 'std', 'min', 'max')
+
+def _process(path, expressions, validate, kwargs):
+    """
+    Compute the statistics of expressions and the validation warnings
+    of a data file, in a worker process.
+
+    Returns a dictionary of results keyed as in the result cache, or the
+    exception raised if the file could not be processed.
+    """
+    try:
+        dtk = DataTaker(filename=path, **kwargs)
+        results = {}
+        for expression in expressions:
+            stats = RunningStats()
+            quantity = dtk.evaluate(expression)
+            stats.update(quantity)
+            results[f'summary {expression}'] = {
+                'units': f'{quantity.units:~P}',
+                'count': stats.count,
+                **{name: float(getattr(stats, name).magnitude)
+                   for name in STATISTICS[1:]}
+            }
+        if validate:
+            results['warnings'] = dtk.validate(verbose=False)
+        return results
+    except Exception as error:
+        return error
+
+class DataTakerCollection():
+    """
+    Analyse several data files at once.
+
+    The files are processed concurrently by a pool of processes, and the
+    results of each file are cached on disk, so that only the new or
+    modified files are processed again.
+
+    Parameters
+    ----------
+    paths : str or iterable of str
+        The paths of the data files, or a directory whose data files
+        (.csv and .xlsx) are all used.
+    workers : int, optional
+        The number of worker processes. Default is the number of CPUs.
+    cache : boolean or ResultCache, default True
+        If True, the results are stored in (and loaded from) the
+        default result cache. A ResultCache object can also be given to
+        use another directory.
+    **kwargs
+        Keyword arguments given to the DataTaker of each file (e.g.
+        `mode` or `exact`).
+
+    Attributes
+    ----------
+    paths : list of str
+        The paths of the data files.
+
+    Examples
+    --------
+    >>> campaign = DataTakerCollection('heating-data')
+    >>> summary = campaign.summary(['Qcond', 'Ptot', '(Qcond+Pfan_in)/Ptot'])
+    >>> summary.pivot(index='file', columns='quantity', values='mean')
+    >>> campaign.validate()
+
+    """
+
+    def __init__(self, paths, workers=None, cache=True, **kwargs):
+        if isinstance(paths, str) and isdir(paths):
+            paths = [join(paths, filename)
+                     for filename in sorted(listdir(paths))
+                     if splitext(filename)[1].lower() in ('.csv', '.xlsx')]
+        self.paths = list(paths)
+        self.workers = workers
+        self._cache = ResultCache() if cache is True else cache or None
+        self._kwargs = kwargs
+
+    def __repr__(self):
+        return f'DataTakerCollection({len(self.paths)} files)'
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __getitem__(self, index):
+        """Return the DataTaker of a file."""
+        return DataTaker(filename=self.paths[index], **self._kwargs)
+
+    def _results(self, expressions=(), validate=False):
+        """
+        Return the results of each file (None for files that could not
+        be processed), computing only those that are not cached.
+        """
+        # The results depend on the options of the DataTakers
+        prefix = repr(sorted(self._kwargs.items()))
+        keys = [f'summary {expression}' for expression in expressions]
+        keys += ['warnings'] if validate else []
+
+        results, todo = [], []
+        for i, path in enumerate(self.paths):
+            cached = {} if self._cache is None else {
+                key[len(prefix)+1:]: value
+                for key, value in self._cache.load(path).items()
+                if key.startswith(prefix + ' ')
+            }
+            results.append(cached)
+            missing = [key for key in keys if key not in cached]
+            if missing:
+                todo.append((i, [key[8:] for key in missing
+                                 if key.startswith('summary ')],
+                             'warnings' in missing))
+
+        outputs = map_files(_process,
+                            [(self.paths[i], expressions, validate,
+                              self._kwargs)
+                             for i, expressions, validate in todo],
+                            self.workers)
+        for (i, _, _), output in zip(todo, outputs):
+            path = self.paths[i]
+            if isinstance(output, Exception):
+                warnings.warn(f'{path} skipped: {output!r}')
+                results[i] = None
+                continue
+            results[i].update(output)
+            if self._cache is not None:
+                self._cache.store(path, {f'{prefix} {key}': value
+                                         for key, value in output.items()})
+        return results
+
+    def summary(self, expressions):
+        """
+        Return the statistics of quantities for each file.
+
+        Parameters
+        ----------
+        expressions : str or list of str
+            The quantities, or expressions of quantities (see the
+            DataTaker.evaluate method). A string holds quantities
+            separated by spaces, as given to the get method.
+
+        Returns
+        -------
+        DataFrame
+            A tidy table with one row per file and expression, and the
+            columns file, quantity, units, count, mean, std, min and
+            max. The files that could not be processed are left out.
+
+        """
+
+        if isinstance(expressions, str):
+            expressions = expressions.split()
+        rows = []
+        for path, results in zip(self.paths,
+                                 self._results(expressions=expressions)):
+            if results is None:
+                continue
+            for expression in expressions:
+                rows.append({'file': basename(path), 'quantity': expression,
+                             **results[f'summary {expression}']})
+        return pd.DataFrame(rows, columns=['file', 'quantity', 'units',
+                                           *STATISTICS])
+
+    def validate(self, verbose=True):
+        """
+        Perform the data checks of DataTaker.validate on every file.
+
+        Parameters
+        ----------
+        verbose : boolean, default True
+            If set to True, the warnings of each file are displayed.
+
+        Returns
+        -------
+        dict
+            The list of warnings of each file, by path (None for files
+            that could not be processed).
+
+        """
+
+        warnings_ = {}
+        for path, results in zip(self.paths, self._results(validate=True)):
+            warnings_[path] = None if results is None else results['warnings']
+            if verbose and results is not None:
+                print(basename(path) + ':',
+                      '; '.join(results['warnings']) or 'no warnings')
+        return warnings_
+
+    def render(self, quantities, directory=None, format='png', **kwargs):
+        """
+        Draw the same plot for every file, and save each figure to an
+        image file (see vaplac.render_files for the parameters).
+
+        Returns
+        -------
+        list
+            The name of the image file of each file (None for files that
+            could not be processed).
+
+        Example
+        -------
+        >>> campaign.render('(Tr Ts) f/rpm (pin pout)/MPa', 'report', 'svg')
+
+        """
+
+        # The options given to the method override those of the collection
+        options = {'workers': self.workers, 'cache': self._cache is not None,
+                   **self._kwargs, **kwargs}
+        return render_files(self.paths, quantities, directory, format,
+                            **options)
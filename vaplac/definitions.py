@@ -0,0 +1,232 @@
+"""
+This module implements the registry of the quantities computed by the
+DataTaker class.
+
+Each quantity (or intermediate result, such as the operating mode or a
+refrigerant state point) is a node defined by the nodes it is computed
+from, the columns of the data file it reads, and a compute function.
+The DataTaker evaluates the nodes needed by a request in dependency
+order, each one only once, and keeps their values until their inputs
+change. The columns of the data file that are not registered are
+available as they are, with the units, property and label given by the
+name converter.
+
+A quantity is added by registering its compute function, e.g.
+
+>>> @define('dT_sc', inputs=('T4', 'T6'))
+... def subcooling(dtk, T4, T6):
+...     return dtk.Q_((T4 - T6).magnitude, 'delta_degC', prop='temperature',
+...                   label='$\\Delta T_{sc}$')
+
+"""
+
+import re
+from collections import namedtuple
+import numpy as np
+
+from . import psychrometrics
+
+# Thermodynamic state of the refrigerant, with p in Pa, T in K and h in J/kg
+StatePoint = namedtuple('StatePoint', 'p T h phase')
+
+# Refrigerant states (pin Tin pout Tout) used to compute the heat
+# transfer rates and the compressor power in each operating mode
+REF_STATES = {
+    'heating': {'Qcond': 'pout T4 pout T6',
+                'Qev': 'pout T6 pin T9',
+                'Pcomp': 'pin T1 pout T2'},
+    'cooling': {'Qcond': 'pout T9 pout T7',
+                'Qev': 'pout T7 pin T4',
+                'Pcomp': 'pin T1 pout T2',
+                'Qloss_ev': 'pin T4 pin T1'}
+}
+
+class Definition():
+    """
+    Definition of a node of the graph of quantities.
+
+    Parameters
+    ----------
+    name : str
+        The name of the node.
+    inputs : tuple of str or dict, default ()
+        The names of the nodes it is computed from. For a node depending
+        on the operating mode, a dictionary with the inputs in 'heating'
+        and 'cooling' modes (a mode may be missing if the node is not
+        defined in that mode).
+    compute : callable
+        Function returning the value of the node, called with the
+        DataTaker and the values of the inputs. For a node depending on
+        the operating mode, a boolean `heating` is given before the
+        values of the inputs.
+    columns : tuple of str, default ()
+        The columns of the data file read directly by the compute
+        function, by their short names.
+
+    """
+
+    def __init__(self, name, inputs=(), compute=None, columns=()):
+        self.name = name
+        self.inputs = inputs
+        self.compute = compute
+        self.columns = tuple(columns)
+
+    def __repr__(self):
+        return f'Definition({self.name!r}, inputs={self.inputs!r})'
+
+    @property
+    def modal(self):
+        """True if the node depends on the operating mode."""
+        return isinstance(self.inputs, dict)
+
+# Registered definitions, by name
+DEFINITIONS = {}
+
+def define(name, inputs=(), columns=()):
+    """
+    Decorator registering a function as the compute function of a node.
+
+    See the Definition class for the parameters.
+    """
+    def register(compute):
+        DEFINITIONS[name] = Definition(name, inputs, compute, columns)
+        return compute
+    return register
+
+def lookup(name, columns):
+    """
+    Return the definition of a node.
+
+    Parameters
+    ----------
+    name : str
+        The name of a registered node, of a refrigerant state point
+        (e.g. 'state(pout, T4)') or of a column of the data file.
+    columns : dict
+        The columns of the data file, by short name (the keys of the
+        `_columns` attribute of the DataTaker).
+
+    Returns
+    -------
+    Definition
+
+    """
+
+    if name in DEFINITIONS:
+        return DEFINITIONS[name]
+    match = re.fullmatch(r'state\((\w+), (\w+)\)', name)
+    if match:
+        return Definition(name, match.groups(), _state)
+    if name in columns:
+        return Definition(name, (), lambda dtk: column(dtk, name),
+                          columns=(name,))
+    raise ValueError(f'unknown quantity: {name!r}')
+
+def column(dtk, name, magnitude=None):
+    """
+    Return a column of the data file as a Quantity, with the units,
+    property and label of the name converter.
+
+    If `magnitude` is given, it replaces the values of the column.
+    """
+    channel = dtk._columns[name]
+    if magnitude is None:
+        magnitude = dtk.raw_data[channel.name].values
+    return dtk.Q_(magnitude, label=channel.label, prop=channel.prop,
+                  units=channel.units)
+
+@define('f', columns=('f',))
+def _frequency(dtk):
+    f = dtk.raw_data[dtk._columns['f'].name].values
+    return column(dtk, 'f', f / 2)  # actual compressor frequency
+
+@define('flowrt_r', inputs=('f',), columns=('flowrt_r',))
+def _flow_rate(dtk, f):
+    flowrt_r = dtk.raw_data[dtk._columns['flowrt_r'].name].values
+    # No flow when the compressor is off, without modifying raw_data
+    return column(dtk, 'flowrt_r', np.where(f.magnitude == 0, 0, flowrt_r))
+
+@define('Pel', inputs=('Pa', 'Pb'))
+def _electrical_power(dtk, Pa, Pb):
+    Pel = Pa + Pb
+    return dtk.Q_(Pel.magnitude, label='$P_{el}$', prop='electrical power',
+                  units=Pel.units).to('kW')
+
+@define('heating', inputs=('refdir',))
+def _heating(dtk, ref_dir):
+    # majority of 0 = heating, majority of 1 = cooling
+    return np.count_nonzero(ref_dir.magnitude) < len(ref_dir) / 2
+
+def _psychrometric(kind, loc):
+    """
+    Return the compute function of a psychrometric property of the
+    supply (loc='s') or return (loc='r') air.
+    """
+    def compute(dtk, T, RH):
+        T, RH = T.to('K').magnitude, RH.to('ratio').magnitude
+        if kind == 'w':
+            return dtk.Q_(psychrometrics.humidity_ratio(T, RH),
+                          label='$\\omega_{' + loc + '}$',
+                          prop='absolute humidity', units='ratio').to('g/kg')
+        elif kind == 'Tdp':
+            return dtk.Q_(psychrometrics.dew_point(T, RH),
+                          label=f'$T_{{dp,{loc}}}$', prop='temperature',
+                          units='K').to('degC')
+        else:
+            return dtk.Q_(psychrometrics.wet_bulb(T, RH),
+                          label=f'$T_{{wb,{loc}}}$', prop='temperature',
+                          units='K').to('degC')
+    return compute
+
+def _air_enthalpy(loc):
+    """Return the compute function of the enthalpy of the air."""
+    def compute(dtk, T, W):
+        return dtk.Q_(psychrometrics.enthalpy(T.to('K').magnitude,
+                                              W.to('ratio').magnitude),
+                      label=f'$h_{{a,{loc}}}$', prop='specific enthalpy',
+                      units='J/kg').to('kJ/kg')
+    return compute
+
+# The last letter locates the air: s(upply) or r(eturn)
+for _loc in 'sr':
+    for _kind in ('w', 'Tdp', 'Twb'):
+        define(_kind + _loc, inputs=(f'T{_loc}', f'RH{_loc}'))(
+            _psychrometric(_kind, _loc))
+    define(f'ha{_loc}', inputs=(f'T{_loc}', f'w{_loc}'))(_air_enthalpy(_loc))
+
+def _state(dtk, p, T):
+    """Return a refrigerant state point from its pressure and temperature."""
+    p, T = p.to('Pa').magnitude, T.to('K').magnitude
+    return StatePoint(p, T, dtk.refrigerant.enthalpy(p, T),
+                      dtk.refrigerant.phase(p, T))
+
+def _power(power):
+    """Return the compute function of a heat transfer rate or power."""
+    def compute(dtk, heating, flow, instate, outstate):
+        return dtk._heat(power, flow, instate, outstate).to('kW')
+    return compute
+
+for _power_name in ('Qcond', 'Qev', 'Pcomp', 'Qloss_ev'):
+    _inputs = {}
+    for _mode, _powers in REF_STATES.items():
+        if _power_name in _powers:
+            _pin, _Tin, _pout, _Tout = _powers[_power_name].split()
+            _inputs[_mode] = ('flowrt_r', f'state({_pin}, {_Tin})',
+                              f'state({_pout}, {_Tout})')
+    define(_power_name, inputs=_inputs)(_power(_power_name))
+
+def _enthalpy(state):
+    """Return the compute function of the enthalpy at a state point."""
+    def compute(dtk, heating, point):
+        return dtk.Q_(point.h, label=f'$h_{state}$', prop='enthalpy',
+                      units='J/kg').to('kJ/kg')
+    return compute
+
+for _state_number in range(1, 10):
+    # Refrigerant pressure (in or out of the compressor) at each state
+    define(f'h{_state_number}', inputs={
+        mode: (f'state(p{"in" if _state_number in low else "out"}, '
+               f'T{_state_number})',)
+        for mode, low in (('heating', (7, 8, 9, 1)),
+                          ('cooling', (6, 5, 4, 3, 1)))
+    })(_enthalpy(_state_number))
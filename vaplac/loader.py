@@ -0,0 +1,96 @@
+"""
+This module implements the load_files function, to compute quantities
+from several data files concurrently.
+
+"""
+
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+from .base import DataTaker
+
+def _load(path, variables, kwargs):
+    """
+    Compute quantities from a data file, in a worker process.
+
+    The quantities are returned as plain data (magnitude, units,
+    property and label), to be rebuilt in the main process, or the
+    exception raised if the file could not be processed.
+    """
+    try:
+        dtk = DataTaker(filename=path, **kwargs)
+        quantities = dtk.get(variables)
+        if len(variables.split()) == 1:
+            quantities = (quantities,)
+        return [(q.magnitude, str(q.units), q.prop, q.label)
+                for q in quantities]
+    except Exception as error:
+        return error
+
+def map_files(function, args, workers=None):
+    """
+    Call a function on several sets of arguments (one per file) with a
+    process pool, and return the results in the same order.
+
+    The function must be defined at the top level of a module, so that
+    the worker processes can import it. If `workers` is 1 or there is a
+    single set of arguments, the calls are made in the current process.
+    """
+    workers = min(workers or os.cpu_count() or 1, max(len(args), 1))
+    if workers == 1:
+        return [function(*arg) for arg in args]
+    with ProcessPoolExecutor(workers) as executor:
+        return list(executor.map(function, *zip(*args)))
+
+def load_files(paths, variables, workers=None, **kwargs):
+    """
+    Compute quantities from several data files, using a process pool.
+
+    A file that cannot be read or processed is skipped with a warning,
+    and does not prevent the other files from being loaded.
+
+    Parameters
+    ----------
+    paths : iterable of str
+        The paths of the data files.
+    variables : str
+        The quantities, as given to the DataTaker.get method.
+    workers : int, optional
+        The number of worker processes. Default is the number of CPUs.
+        If set to 1, the files are loaded in the current process.
+    **kwargs
+        Keyword arguments given to the DataTaker of each file (e.g.
+        `mode` or `exact`).
+
+    Returns
+    -------
+    list
+        For each path, in the same order, the result of the get method
+        (a Quantity or a tuple of Quantity objects), or None if the file
+        was skipped.
+
+    Example
+    -------
+    >>> paths = ['test1.csv', 'test2.csv', 'test3.csv']
+    >>> for Qcond, Pel in filter(None, load_files(paths, 'Qcond Pel')):
+    ...     print(Qcond.mean() / Pel.mean())
+
+    """
+
+    paths = list(paths)
+    outputs = map_files(_load, [(path, variables, kwargs) for path in paths],
+                        workers)
+
+    Q_ = DataTaker.Q_
+    results = []
+    for path, output in zip(paths, outputs):
+        if isinstance(output, Exception):
+            warnings.warn(f'{path} skipped: {output!r}')
+            results.append(None)
+            continue
+        quantities = tuple(Q_(magnitude, units, prop=prop, label=label)
+                           for magnitude, units, prop, label in output)
+        results.append(quantities[0] if len(quantities) == 1
+                       else quantities)
+    return results
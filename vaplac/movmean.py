@@ -1,4 +1,4 @@
-import numpy as np
+from .rolling import Rolling
 
 def movmean(a, n):
     """
@@ -6,15 +6,16 @@ def movmean(a, n):
 
     Parameters
     ----------
-    a : array_like
+    a : array_like or xpint Quantity
         Input array.
     n : int
-        Size of the window used to compute the moving average.
-        This value must be odd, otherwise it will be incremented.
+        Size of the window used to compute the moving average, centered
+        on each sample. The windows are shortened at the edges, and NaN
+        values are left out of them.
 
     Returns
     -------
-    array_like
+    ndarray or xpint Quantity
         Moving mean of array a with window of size n.
 
     Examples
@@ -22,19 +23,10 @@ def movmean(a, n):
     >>> a = np.random.rand(50)
     >>> mean = vpa.movmean(a, 9)
 
+    See also
+    --------
+    vaplac.rolling.Rolling : other statistics over moving windows.
+
     """
 
-    # Increment n if it is even
-    n += 1 if n % 2 == 0 else 0
-    l = (n-1) // 2  # edge length
-    # Compute cumulative sum
-    cumsum = np.cumsum(a, dtype=float)
-    # Get a moving sum everywhere but on the edges
-    movsum = (np.append(cumsum[l:], np.zeros(l))
-              - np.append(np.zeros(l+1), cumsum[:-l-1]))
-    # Fill the edges by mirroring them and computing their moving sum
-    cumsum_refl = np.cumsum(np.pad(a, (l+1, l+1), 'reflect'))
-    movsum_refl = cumsum_refl[n:] - cumsum_refl[:-n]
-    movsum[:l] = movsum_refl[:l]
-    movsum[-l:] = movsum_refl[-l-1:-1]
-    return movsum / n
+    return Rolling(a, n).mean()
@@ -0,0 +1,251 @@
+"""
+This module implements psychrometric functions of moist air, evaluated
+in bulk on NumPy arrays.
+
+The saturation pressure of water vapour is computed with the
+correlations of Hyland and Wexler (ASHRAE Handbook - Fundamentals,
+2017, chapter 1), over ice below 0 °C and over liquid water above,
+corrected by the enhancement factor of Buck (1981). The other
+properties derive from the ideal gas relations of the ASHRAE Handbook.
+
+Accuracy
+--------
+Over the ambient range -20 °C < T < 50 °C and 5 % < RH < 100 %, at
+atmospheric pressure, the results agree with CoolProp's HAPropsSI
+within:
+    - 0.2 % for the humidity ratio,
+    - 0.02 K for the dew point,
+    - 0.02 K for the wet bulb temperature, except within 1 K of 0 °C
+      where the psychrometric equations over water and over ice may
+      both have a solution (up to 0.7 K),
+    - 0.1 kJ/kg of dry air for the enthalpy.
+
+All temperatures are in K, pressures in Pa, relative humidities as
+ratios (between 0 and 1), humidity ratios in kg of water per kg of
+dry air and enthalpies in J/kg of dry air.
+
+Relative humidities of zero or below (e.g. a sensor reading 0 %) are
+those of dry air: its dew point is undefined, and returned as NaN, while
+its wet bulb temperature is computed with RH = 0.
+
+"""
+
+import numpy as np
+
+# Ratio of the molar masses of water and dry air
+EPSILON = 0.621945
+# Hyland and Wexler coefficients, over ice and over liquid water
+_ICE = (-5.6745359e3, 6.3925247, -9.6778430e-3, 6.2215701e-7,
+        2.0747825e-9, -9.4840240e-13, 4.1635019)
+_WATER = (-5.8002206e3, 1.3914993, -4.8640239e-2, 4.1764768e-5,
+          -1.4452093e-8, 0, 6.5459673)
+
+def _log_saturation_pressure(T, ice=None):
+    """
+    Return ln(pws) and its derivative with respect to T.
+
+    Saturation is over ice if `ice` is True, over liquid water if it is
+    False, and over ice only below 0 °C if it is None.
+    """
+    T = np.asarray(T, dtype=float)
+    if ice is None:
+        ice = T < 273.15
+        # Avoid selecting the coefficients sample by sample when possible
+        ice = ice.flat[0] if ice.size and (ice.all() or not ice.any()) else ice
+    if isinstance(ice, np.ndarray):
+        c = [np.where(ice, ci, cw) for ci, cw in zip(_ICE, _WATER)]
+    else:
+        c = _ICE if ice else _WATER
+    ln_p = (c[0] / T + c[1] + c[2] * T + c[3] * T**2 + c[4] * T**3
+            + c[5] * T**4 + c[6] * np.log(T))
+    dln_p = (-c[0] / T**2 + c[2] + 2 * c[3] * T + 3 * c[4] * T**2
+             + 4 * c[5] * T**3 + c[6] / T)
+    return ln_p, dln_p
+
+def enhancement_factor(p=101325):
+    """
+    Return the enhancement factor of water vapour in air (Buck, 1981).
+
+    Parameters
+    ----------
+    p : array_like, default 101325
+        Total pressure, in Pa.
+
+    """
+
+    return 1.0007 + 3.46e-8 * np.asarray(p, dtype=float)
+
+def saturation_pressure(T):
+    """
+    Return the saturation pressure of water vapour.
+
+    Parameters
+    ----------
+    T : array_like
+        Temperature, in K.
+
+    Returns
+    -------
+    ndarray
+        Saturation pressure over ice (below 0 °C) or liquid water, in Pa.
+
+    Examples
+    --------
+    >>> saturation_pressure([263.15, 293.15])
+    array([ 259.9...,  2338.8...])
+
+    """
+
+    return np.exp(_log_saturation_pressure(T)[0])
+
+def humidity_ratio(T, RH, p=101325):
+    """
+    Return the humidity ratio of moist air.
+
+    Parameters
+    ----------
+    T : array_like
+        Dry bulb temperature, in K.
+    RH : array_like
+        Relative humidity, as a ratio.
+    p : array_like, default 101325
+        Total pressure, in Pa.
+
+    Returns
+    -------
+    ndarray
+        Humidity ratio, in kg/kg of dry air.
+
+    """
+
+    pw = enhancement_factor(p) * np.asarray(RH) * saturation_pressure(T)
+    return EPSILON * pw / (p - pw)
+
+def dew_point(T, RH):
+    """
+    Return the dew point temperature of moist air.
+
+    The dew point is found by solving pws(Tdp) = RH pws(T) with a few
+    Newton iterations, starting from the Magnus approximation. It is
+    NaN where RH <= 0, the dew point of dry air being undefined.
+
+    Parameters
+    ----------
+    T : array_like
+        Dry bulb temperature, in K.
+    RH : array_like
+        Relative humidity, as a ratio.
+
+    Returns
+    -------
+    ndarray
+        Dew point temperature, in K.
+
+    """
+
+    T, RH = np.broadcast_arrays(np.asarray(T, dtype=float),
+                                np.asarray(RH, dtype=float))
+    # Dry air, masked without taking the log of zero
+    dry = RH <= 0
+    ln_pw = np.log(np.where(dry, 1., RH)) + _log_saturation_pressure(T)[0]
+    # Initial guess with the Magnus formula
+    gamma = ln_pw - np.log(611.2)
+    Tdp = 273.15 + 243.12 * gamma / (17.62 - gamma)
+    for _ in range(4):
+        ln_p, dln_p = _log_saturation_pressure(Tdp)
+        Tdp = Tdp - (ln_p - ln_pw) / dln_p
+    return np.where(dry, np.nan, Tdp)
+
+def _psychrometric_root(T, W, p, ice, T0, T1, iterations):
+    """
+    Solve the psychrometric equation over water or ice with the secant
+    method, starting from temperatures T0 and T1.
+    """
+    t = T - 273.15
+    f = enhancement_factor(p)
+    if ice:
+        a, b, c, d = 2830, 0.24, 1.86, 2.1
+    else:
+        a, b, c, d = 2501, 2.326, 1.86, 4.186
+
+    def residual(T_wb):
+        """Humidity ratio from the psychrometric equation, minus W."""
+        t_wb = T_wb - 273.15
+        pw = f * np.exp(_log_saturation_pressure(T_wb, ice)[0])
+        W_wb = EPSILON * pw / (p - pw)
+        return ((a - b * t_wb) * W_wb - 1.006 * (t - t_wb)) \
+            / (a + c * t - d * t_wb) - W
+
+    r0, r1 = residual(T0), residual(T1)
+    for _ in range(iterations):
+        converged = np.abs(r1 - r0) < 1e-15
+        T2 = np.where(converged, T1,
+                      T1 - r1 * (T1 - T0) / np.where(converged, 1, r1 - r0))
+        T0, r0 = T1, r1
+        T1, r1 = T2, residual(T2)
+    return T1
+
+def wet_bulb(T, RH, p=101325, iterations=8):
+    """
+    Return the thermodynamic wet bulb temperature of moist air.
+
+    The psychrometric equation of the ASHRAE Handbook is solved over
+    liquid water, all samples being iterated at once with the secant
+    method. It is solved over ice for the samples whose wet bulb
+    temperature is below 0 °C. Relative humidities below zero are
+    taken as zero (dry air).
+
+    Parameters
+    ----------
+    T : array_like
+        Dry bulb temperature, in K.
+    RH : array_like
+        Relative humidity, as a ratio.
+    p : float, default 101325
+        Total pressure, in Pa.
+    iterations : int, default 8
+        Number of secant iterations.
+
+    Returns
+    -------
+    ndarray
+        Wet bulb temperature, in K.
+
+    """
+
+    T, RH = np.broadcast_arrays(np.asarray(T, dtype=float),
+                                np.maximum(np.asarray(RH, dtype=float), 0))
+    W = humidity_ratio(T, RH, p)
+    # The dew point and the dry bulb temperature bracket the solution.
+    # Dry air has no dew point: the iterations start 30 K below T
+    T_dp = np.where(RH > 0, dew_point(T, RH), T - 30)
+    T_wb = _psychrometric_root(T, W, p, False, T_dp, T, iterations)
+    frozen = T_wb < 273.15
+    if frozen.any():
+        T_wb[frozen] = _psychrometric_root(T[frozen], W[frozen], p, True,
+                                           T_dp[frozen], T[frozen],
+                                           iterations)
+    return T_wb
+
+def enthalpy(T, W):
+    """
+    Return the specific enthalpy of moist air.
+
+    The reference state is dry air and liquid water at 0 °C.
+
+    Parameters
+    ----------
+    T : array_like
+        Dry bulb temperature, in K.
+    W : array_like
+        Humidity ratio, in kg/kg of dry air.
+
+    Returns
+    -------
+    ndarray
+        Specific enthalpy, in J/kg of dry air.
+
+    """
+
+    t = np.asarray(T, dtype=float) - 273.15
+    return 1006 * t + np.asarray(W) * (2501e3 + 1860 * t)
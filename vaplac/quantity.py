@@ -0,0 +1,132 @@
+"""
+This module implements the Quantity class of vaplac, which extends that
+of xpint with the statistical tools of vaplac: descriptive statistics
+computed in a single pass (see vaplac.stats) and statistics over moving
+windows (see vaplac.rolling).
+
+The quantities returned by a DataTaker are instances of this class,
+whose unit registry is built by vaplac.base.unit_registry.
+
+"""
+
+import numpy as np
+from xpint import _Quantity
+
+from .rolling import Rolling
+from .stats import describe
+
+class Quantity(_Quantity):
+    """
+    Quantity of xpint, with the statistical methods of vaplac.
+
+    See xpint.UnitRegistry().Quantity for the attributes.
+    """
+
+    def describe(self, index=slice(0, None), percentiles=None):
+        """
+        Return the min, max, mean and standard deviation of the quantity,
+        computed in a single pass (see vaplac.stats.describe).
+
+        Parameters
+        ----------
+        index : slice or list of slice, default slice(0, None)
+            The samples taken into account, e.g. the steady-state
+            periods (see DataTaker.steady_state).
+        percentiles : iterable of float, optional
+            Percentages of the percentiles to compute, e.g. (5, 50, 95).
+
+        Returns
+        -------
+        vaplac.stats.Summary
+            The statistics, as Quantity objects, displayed with the
+            property of the quantity.
+
+        Example
+        -------
+        >>> COP.describe(percentiles=(5, 95)).std
+
+        """
+
+        # Specify the property
+        if self.dimensionless:
+            if self.prop is None:
+                title = 'dimensionless quantity'
+            else:
+                title = f'{self.prop} (dimensionless quantity)'
+        else:
+            if self.prop is None:
+                title = f'Unspecified property (with units {self.units})'
+            else:
+                title = self.prop
+
+        magnitude = np.ravel(self.magnitude)
+        if isinstance(index, list):
+            # Put the samples of the intervals end to end
+            magnitude = np.concatenate([magnitude[segment]
+                                        for segment in index]
+                                       or [magnitude[:0]])
+        else:
+            magnitude = magnitude[index]
+        summary = describe(magnitude, percentiles)
+        summary.title = title
+        to_quantity = lambda value, units=self.units: self.__class__(
+            value, units, prop=self.prop, label=self.label)
+        summary.min, summary.max, summary.mean = map(
+            to_quantity, (summary.min, summary.max, summary.mean))
+        # Units of a difference of samples (e.g. delta_degC)
+        delta = self.__class__(0., self.units) - self.__class__(0., self.units)
+        summary.std = to_quantity(summary.std, delta.units)
+        summary.percentiles = {p: to_quantity(value)
+                               for p, value in summary.percentiles.items()}
+        return summary
+
+    def info(self, index=slice(0, None), percentiles=None):
+        """
+        Display the min, max, mean and standard deviation of the quantity,
+        and the given percentiles (see the describe method).
+
+        Example
+        -------
+        >>> COP.info(percentiles=(5, 95))
+
+        """
+        print(self.describe(index, percentiles))
+
+    def movmean(self, n):
+        """
+        Compute the moving mean of the Quantity.
+
+        Parameters
+        ----------
+        n : int
+            Size of the window used to compute the moving average,
+            centered on each sample. The windows are shortened at the
+            edges, and NaN values are left out of them.
+
+        Returns
+        -------
+        Quantity
+            Moving mean of the quantity with window of size n.
+
+        Example
+        -------
+        >>> f.movmean(15)
+
+        """
+
+        return self.rolling(n).mean()
+
+    def rolling(self, window, time=None, center=True, min_count=1):
+        """
+        Return the statistics of the Quantity over moving windows.
+
+        See vaplac.rolling.Rolling for the parameters.
+
+        Examples
+        --------
+        >>> f.rolling(15).std()
+        >>> f.rolling('1 h', time=timestamps).max()
+
+        """
+
+        return Rolling(self, window, time, center, min_count)
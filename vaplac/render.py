@@ -0,0 +1,148 @@
+"""
+This module implements the render_files function, to draw the same plot
+for several data files and save the figures to image files, without
+any display.
+
+"""
+
+import os
+from os.path import abspath, basename, dirname, join, splitext
+import hashlib
+import shutil
+import warnings
+
+from ._cache import CACHE_DIR, file_hash
+from .loader import map_files
+
+def _render(path, quantities, output, plot_kwargs, figure_kwargs, kwargs):
+    """
+    Draw the plot of a data file and save it, in a worker process.
+
+    The figure is created without pyplot, so that no display (nor
+    interactive backend) is needed. Returns the name of the image file,
+    or the exception raised if the file could not be processed.
+    """
+    try:
+        from matplotlib.figure import Figure
+        from .base import DataTaker
+
+        fig = Figure(figsize=figure_kwargs['figsize'],
+                     dpi=figure_kwargs['dpi'])
+        dtk = DataTaker(filename=path, **kwargs)
+        dtk.plot(quantities, fig=fig, **plot_kwargs)
+        fig.suptitle(basename(path))
+        tmp = f'{output}.{os.getpid()}{splitext(output)[1]}'
+        fig.savefig(tmp)
+        os.replace(tmp, output)
+        return output
+    except Exception as error:
+        return error
+
+def render_files(paths, quantities, directory=None, format='png',
+                 workers=None, cache=True, figsize=None, dpi=None,
+                 plot_kwargs=None, **kwargs):
+    """
+    Draw the same plot for several data files, and save each figure to
+    an image file.
+
+    The figures are drawn by a pool of processes, with a
+    non-interactive backend. The images are cached by content of the
+    data file and specification of the plot, so that unchanged files are
+    not drawn again.
+
+    Parameters
+    ----------
+    paths : iterable of str
+        The paths of the data files.
+    quantities : str
+        The quantities to be plotted, as given to the DataTaker.plot
+        method (e.g. '(Tr Ts) f/rpm (pin pout)/MPa'). They must be
+        named, since no quantity is computed yet when a file is read.
+    directory : str, optional
+        The directory where the images are saved, each one named after
+        its data file with the extension of the format appended (e.g.
+        test1.csv.png). Default is the directory of each data file.
+    format : {'png', 'svg', 'pdf'}, default 'png'
+        The format of the images (any format supported by matplotlib).
+    workers : int, optional
+        The number of worker processes. Default is the number of CPUs.
+        If set to 1, the figures are drawn in the current process.
+    cache : boolean, default True
+        If set to False, every figure is drawn again.
+    figsize : tuple of float, optional
+        The size of the figures in inches. Default is matplotlib's.
+    dpi : float, optional
+        The resolution of the figures. Default is matplotlib's.
+    plot_kwargs : dict, optional
+        Keyword arguments given to the DataTaker.plot method (e.g.
+        `timestamp` or `time`).
+    **kwargs
+        Keyword arguments given to the DataTaker of each file (e.g.
+        `mode` or `exact`).
+
+    Returns
+    -------
+    list
+        For each path, in the same order, the name of its image file, or
+        None if the file could not be processed.
+
+    Example
+    -------
+    >>> render_files(['test1.csv', 'test2.csv'],
+    ...              '(Tr Ts) f/rpm (pin pout)/MPa', directory='report',
+    ...              format='pdf')
+    ['report/test1.csv.pdf', 'report/test2.csv.pdf']
+
+    """
+
+    paths = list(paths)
+    plot_kwargs = {} if plot_kwargs is None else plot_kwargs
+    figure_kwargs = {'figsize': figsize, 'dpi': dpi}
+    # Images drawn with the same specification share a prefix
+    spec = repr((quantities, format, sorted(plot_kwargs.items()),
+                 sorted(figure_kwargs.items()), sorted(kwargs.items())))
+    spec = hashlib.blake2b(spec.encode(), digest_size=8).hexdigest()
+    cache_dir = join(CACHE_DIR, 'figures')
+    if directory is not None:
+        os.makedirs(directory, exist_ok=True)
+
+    outputs, cached, todo = [], [], []
+    sources = {}
+    for i, path in enumerate(paths):
+        output = join(dirname(path) if directory is None else directory,
+                      f'{basename(path)}.{format}')
+        # Files with the same name in different directories
+        if sources.setdefault(output, abspath(path)) != abspath(path):
+            stem, k = splitext(output)[0], 2
+            while f'{stem}-{k}.{format}' in sources:
+                k += 1
+            warnings.warn(f'{path} saved to {stem}-{k}.{format}, since '
+                          f'{output} is the image of another file')
+            output = f'{stem}-{k}.{format}'
+            sources[output] = abspath(path)
+        outputs.append(output)
+        try:
+            cached.append(join(cache_dir,
+                               f'{spec}-{file_hash(path)}.{format}'))
+        except OSError as error:
+            warnings.warn(f'{path} skipped: {error!r}')
+            outputs[i] = None
+            cached.append(None)
+            continue
+        if cache and os.path.exists(cached[i]):
+            shutil.copyfile(cached[i], output)
+        else:
+            todo.append(i)
+
+    results = map_files(_render,
+                        [(abspath(paths[i]), quantities, abspath(outputs[i]),
+                          plot_kwargs, figure_kwargs, kwargs) for i in todo],
+                        workers)
+    for i, result in zip(todo, results):
+        if isinstance(result, Exception):
+            warnings.warn(f'{paths[i]} skipped: {result!r}')
+            outputs[i] = None
+        elif cache:
+            os.makedirs(cache_dir, exist_ok=True)
+            shutil.copyfile(outputs[i], cached[i])
+    return outputs
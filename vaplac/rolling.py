@@ -0,0 +1,307 @@
+"""
+This module implements the Rolling class, to compute statistics of a
+quantity over moving windows: sum, mean, variance, standard deviation,
+minimum, maximum and median.
+
+The windows hold a number of samples, or a duration when the time of
+the samples is given (so that gaps in the data are accounted for). The
+windows are shortened at the edges of the data, and NaN samples are
+left out of them.
+
+Algorithms
+----------
+The samples are split into blocks of the width of the widest window, so
+that each window overlaps at most two consecutive blocks. Within each
+block, the prefix sums (and the prefix and suffix minima and maxima, as
+in the algorithm of van Herk and Gil-Werman) are computed with a few
+NumPy operations, and the statistic of a window is combined from those
+of its two blocks. All statistics but the median are thus computed in
+O(n) operations, whatever the size of the windows. As the sums are
+accumulated within a block only, and the variance is computed on the
+samples shifted by their mean, their rounding errors do not grow with
+the length of the data. The median is computed on the samples of each
+window gathered in an array, by chunks of windows, in O(n * width).
+
+"""
+
+import warnings
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Number of samples gathered at once to compute the medians
+CHUNK_SIZE = 2**22
+
+def _seconds(time):
+    """Return times (numbers in seconds, datetimes or Quantity) in s."""
+    if hasattr(time, 'units'):
+        return np.asarray(time.to('s').magnitude, dtype=float)
+    time = np.asarray(time)
+    if time.dtype.kind == 'O':
+        import pandas as pd
+        time = pd.to_datetime(time).values
+    if time.dtype.kind == 'M':
+        return (time - time[0]) / np.timedelta64(1, 's')
+    return time.astype(float)
+
+def _duration(window):
+    """Return a duration (number in seconds, str or Quantity) in s."""
+    if hasattr(window, 'units'):
+        return float(window.to('s').magnitude)
+    if isinstance(window, (str, np.timedelta64)):
+        import pandas as pd
+        return pd.Timedelta(window).total_seconds()
+    return float(window)
+
+def windows(n, window, time=None, center=True):
+    """
+    Return the start and stop indices of the window of each sample.
+
+    Parameters
+    ----------
+    n : int
+        The number of samples.
+    window : int, float, str or Quantity
+        The number of samples in each window or, if `time` is given, the
+        duration of the windows (in seconds if a number is given, e.g.
+        '15 min' or Q_(15, 'min') otherwise).
+    time : array_like, optional
+        The time of each sample, in increasing order (numbers in seconds,
+        datetimes or a Quantity).
+    center : boolean, default True
+        If True, the windows are centered on the samples, otherwise they
+        end at the samples.
+
+    Returns
+    -------
+    tuple of ndarray
+        The start (included) and stop (excluded) indices of the windows.
+
+    """
+
+    i = np.arange(n)
+    if time is None:
+        window = int(window)
+        if window < 1:
+            raise ValueError('The window must hold at least one sample.')
+        start = i - window//2 if center else i - window + 1
+        return np.maximum(start, 0), np.minimum(start + window, n)
+
+    t, duration = _seconds(time), _duration(window)
+    if center:
+        return (np.searchsorted(t, t - duration/2, 'left'),
+                np.searchsorted(t, t + duration/2, 'right'))
+    return np.searchsorted(t, t - duration, 'right'), i + 1
+
+def intervals(mask, margin=0):
+    """
+    Return the intervals where `mask` is True, as a list of slices.
+
+    Each interval is widened by `margin` samples on both sides, or by
+    (before, after) samples if a tuple is given (e.g. half a window, so
+    that it covers the whole windows that were selected), and the
+    overlapping intervals are merged.
+    """
+    before, after = (margin, margin) if np.isscalar(margin) else margin
+    mask = np.asarray(mask, dtype=np.int8)
+    edges = np.flatnonzero(np.diff(np.concatenate([[0], mask, [0]])))
+    if len(edges) == 0:
+        return []
+    starts = np.maximum(edges[::2] - before, 0)
+    stops = np.minimum(edges[1::2] + after, len(mask))
+    # Intervals starting after the end of the previous one
+    new = np.concatenate([[True], starts[1:] > stops[:-1]])
+    stops = np.append(stops[np.flatnonzero(new)[1:] - 1], stops[-1])
+    return [slice(int(start), int(stop))
+            for start, stop in zip(starts[new], stops)]
+
+class Rolling():
+    """
+    Statistics of a quantity over moving windows.
+
+    Parameters
+    ----------
+    quantity : xpint Quantity or array_like
+        The samples. The statistics of a Quantity are returned as
+        Quantity objects, with the same property and label.
+    window : int, float, str or Quantity
+        The number of samples in each window or, if `time` is given, the
+        duration of the windows (in seconds if a number is given, e.g.
+        '15 min' or Q_(15, 'min') otherwise).
+    time : array_like, optional
+        The time of each sample, in increasing order (numbers in seconds,
+        datetimes or a Quantity).
+    center : boolean, default True
+        If True, the windows are centered on the samples, otherwise they
+        end at the samples.
+    min_count : int, default 1
+        The minimum number of valid (non-NaN) samples in a window, below
+        which its statistics are NaN.
+
+    Examples
+    --------
+    >>> f = dtk.get('f')
+    >>> Rolling(f, 15).mean()
+    >>> Rolling(f, '1 h', time=timestamps, center=False).std()
+
+    """
+
+    def __init__(self, quantity, window, time=None, center=True,
+                 min_count=1):
+        self._template = quantity if hasattr(quantity, 'units') else None
+        magnitude = getattr(quantity, 'magnitude', quantity)
+        self._values = np.asarray(magnitude, dtype=float).ravel()
+        self._valid = ~np.isnan(self._values)
+        self.start, self.stop = windows(len(self._values), window, time,
+                                        center)
+        self.window = window
+        self.min_count = max(min_count, 1)
+        # Width of the blocks, that of the widest window
+        self._width = int(max((self.stop - self.start).max(initial=1), 1))
+
+    def __repr__(self):
+        return f'Rolling({self.window!r}, {len(self._values)} samples)'
+
+    def _quantity(self, values, units=None):
+        """Return statistics as a Quantity if the samples are one."""
+        values = np.where(self._counts() >= self.min_count, values, np.nan)
+        q = self._template
+        if q is None:
+            return values
+        return q.__class__(values, q.units if units is None else units,
+                           prop=q.prop, label=q.label)
+
+    def _delta_units(self):
+        """Units of a difference of samples (e.g. delta_degC)."""
+        q = self._template
+        return (q.__class__(0., q.units) - q.__class__(0., q.units)).units
+
+    def _counts(self):
+        """Return the number of valid samples in each window."""
+        if not hasattr(self, '_count'):
+            cumsum = np.concatenate([[0], np.cumsum(self._valid)])
+            self._count = cumsum[self.stop] - cumsum[self.start]
+        return self._count
+
+    def _sums(self, values):
+        """Return the sums of values over the windows."""
+        width, n = self._width, len(values)
+        nblocks = n // width + 1
+        blocks = np.zeros((nblocks, width + 1))
+        blocks[:, 1:].flat[:n] = values
+        # Prefix sums within each block, and total of each block
+        prefix = np.cumsum(blocks, axis=1)
+        totals = prefix[:, width]
+        start, stop = self.start, self.stop
+        first, last = start // width, stop // width
+        return (prefix[last, stop % width] - prefix[first, start % width]
+                + np.where(last > first, totals[first], 0.))
+
+    def _gather(self, values, fill, index=slice(None)):
+        """
+        Yield the indices of chunks of windows (among `index`) and the
+        samples of these windows, as the rows of 2-D arrays padded with
+        `fill`.
+        """
+        width = self._width
+        padded = np.concatenate([values, np.full(width, fill)])
+        view = sliding_window_view(padded, width)
+        index = np.arange(len(values))[index]
+        rows = max(CHUNK_SIZE // width, 1)
+        for i in range(0, len(index), rows):
+            chunk = index[i:i+rows]
+            block = view[self.start[chunk]]
+            lengths = self.stop[chunk] - self.start[chunk]
+            block[np.arange(width) >= lengths[:, None]] = fill
+            yield chunk, block
+
+    def _extremum(self, ufunc, identity):
+        """Return the minima (ufunc=np.minimum) or maxima of the windows."""
+        width, n = self._width, len(self._values)
+        values = np.where(self._valid, self._values, identity)
+        nblocks = -(-n // width)
+        blocks = np.full(nblocks * width, identity)
+        blocks[:n] = values
+        blocks = blocks.reshape(nblocks, width)
+        prefix = ufunc.accumulate(blocks, axis=1).ravel()
+        suffix = ufunc.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+        start, last = self.start, self.stop - 1
+        # Windows overlapping two blocks
+        result = ufunc(suffix[start], prefix[last])
+        # Windows within a block, starting at its beginning or ending at
+        # its end (or at the end of the data)
+        within = start // width == last // width
+        aligned = within & (start % width == 0)
+        result[aligned] = prefix[last[aligned]]
+        to_end = within & ~aligned & ((last % width == width - 1)
+                                      | (last == n - 1))
+        result[to_end] = suffix[start[to_end]]
+        # Other windows within a block (only with time-based windows)
+        others = np.flatnonzero(within & ~aligned & ~to_end)
+        for chunk, block in self._gather(values, identity, others):
+            result[chunk] = ufunc.reduce(block, axis=1)
+        return result
+
+    def count(self):
+        """Number of valid (non-NaN) samples in each window."""
+        return self._counts().copy()
+
+    def sum(self):
+        """Sum of the samples in each window."""
+        return self._quantity(self._sums(np.where(self._valid, self._values,
+                                                  0.)))
+
+    def mean(self):
+        """Mean of the samples in each window."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = (self._sums(np.where(self._valid, self._values, 0.))
+                    / self._counts())
+        return self._quantity(mean)
+
+    def var(self, ddof=0):
+        """
+        Variance of the samples in each window.
+
+        Parameters
+        ----------
+        ddof : int, default 0
+            Delta degrees of freedom: the sum of the squared deviations
+            is divided by the number of samples minus ddof.
+
+        """
+
+        # Shift the samples to avoid cancellations
+        shifted = np.where(self._valid,
+                           self._values - (np.nanmean(self._values)
+                                           if self._valid.any() else 0), 0.)
+        s1, s2 = self._sums(shifted), self._sums(shifted**2)
+        count = self._counts()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            var = np.maximum(s2 - s1**2 / count, 0) / (count - ddof)
+        var[count <= ddof] = np.nan
+        return self._quantity(var, None if self._template is None
+                              else self._delta_units()**2)
+
+    def std(self, ddof=0):
+        """Standard deviation of the samples in each window (see var)."""
+        var = self.var(ddof)
+        std = np.sqrt(getattr(var, 'magnitude', var))
+        return self._quantity(std, None if self._template is None
+                              else self._delta_units())
+
+    def min(self):
+        """Minimum of the samples in each window."""
+        return self._quantity(self._extremum(np.minimum, np.inf))
+
+    def max(self):
+        """Maximum of the samples in each window."""
+        return self._quantity(self._extremum(np.maximum, -np.inf))
+
+    def median(self):
+        """Median of the samples in each window."""
+        median = np.empty(len(self._values))
+        with warnings.catch_warnings():
+            # Windows without valid samples
+            warnings.simplefilter('ignore', RuntimeWarning)
+            for chunk, block in self._gather(self._values, np.nan):
+                median[chunk] = np.nanmedian(block, axis=1)
+        return self._quantity(median)
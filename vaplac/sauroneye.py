@@ -2,31 +2,225 @@
 This modules regroups all the check functions used to validate the data
 read by a DataTaker. Each function corresponds to a particular test.
 
+The checks are registered with the `check` decorator, along with the
+quantities they use. The run_checks function computes all these
+quantities at once, then runs the checks concurrently, each one
+returning the value of its metric, the samples at fault and the
+intervals where it fails.
+
+The checks are evaluated over moving windows, so that a short fault
+(e.g. a cycling episode during a 3-day test) is detected and located
+without flagging the whole file. Their `window` option sets the size of
+the windows in samples; if it is None, the whole file is checked at
+once.
+
+A check is added by registering its function, e.g.
+
+>>> @check('T1 T2', plot='(T1 T2)')
+... def discharge_check(dtk, T1, T2):
+...     \"\"\"Check whether the compressor heats the refrigerant.\"\"\"
+...     mask = np.asarray(T2 < T1)
+...     message = 'T2 is below T1.' if mask.any() else None
+...     return mask.mean(), mask, message, failing_intervals(mask)
+
 """
 
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 
-# Store quantities used to check the data,
-# for plotting in DataTaker.validate method.
-_checkargs = {}
-
-def humidity_check(field, dtk, error):
-    """Check whether the humidity ratio is increasing."""
-    _checkargs['humidity_check'] = '(wr ws)'
-    wr, ws = dtk.get('wr ws')
-    overhum = (wr < ws).sum() / len(wr)
-    if overhum > 0.02:
-        msg = ('The supply humidity ratio exceeds '
-               f'the return humidity ratio {overhum:.1%} of the time.')
-        error(field, msg)
-
-def cycling_check(field, dtk, error):
-    """Check if there is cycling."""
-    _checkargs['cycling_check'] = 'f'
+from .rolling import Rolling, intervals as failing_intervals
+from .stats import MovingMean
+
+# Result of a check. The value is that of the metric compared with the
+# threshold of the check (its worst value over the windows), the mask is
+# True for the samples at fault, the message is None if the check passed
+# and the intervals are slices of the samples where it failed.
+CheckResult = namedtuple('CheckResult',
+                         'name severity value mask message intervals')
+
+# Registered checks, by name
+CHECKS = {}
+
+class Check():
+    """
+    Data check performed by DataTaker.validate.
+
+    Parameters
+    ----------
+    name : str
+        The name of the check.
+    function : callable
+        Function called with the DataTaker, the values of the quantities
+        and the options of the check as keyword arguments, returning the
+        value of the metric, the boolean mask of the samples at fault,
+        the warning message (None if the check passed) and the list of
+        intervals (slices) where it failed.
+    inputs : tuple of str
+        The quantities used by the check.
+    severity : {'warning', 'error'}, default 'warning'
+        The severity of a failure.
+    plot : str, optional
+        The quantities plotted when the check fails, as given to the
+        DataTaker.plot method. Default is the inputs.
+
+    """
+
+    def __init__(self, name, function, inputs, severity='warning',
+                 plot=None):
+        self.name = name
+        self.function = function
+        self.inputs = tuple(inputs)
+        self.severity = severity
+        self.plot = ' '.join(self.inputs) if plot is None else plot
+
+    def __repr__(self):
+        return f'Check({self.name!r}, inputs={self.inputs!r})'
+
+    def __call__(self, dtk, quantities, **options):
+        """Run the check, with the quantities by name."""
+        value, mask, message, intervals = self.function(
+            dtk, *(quantities[name] for name in self.inputs), **options)
+        return CheckResult(self.name, self.severity, value,
+                           np.asarray(mask, dtype=bool), message, intervals)
+
+def check(inputs, severity='warning', plot=None):
+    """
+    Decorator registering a check function under its name.
+
+    See the Check class for the parameters; `inputs` may be given as a
+    string of quantities separated by spaces.
+    """
+    if isinstance(inputs, str):
+        inputs = inputs.split()
+    def register(function):
+        CHECKS[function.__name__] = Check(function.__name__, function,
+                                          inputs, severity, plot)
+        return function
+    return register
+
+def run_checks(dtk, names=None, workers=None, options=None):
+    """
+    Run data checks on a DataTaker.
+
+    Parameters
+    ----------
+    dtk : DataTaker
+        The DataTaker whose data is checked.
+    names : iterable of str, optional
+        The names of the checks. Default is all the registered checks.
+    workers : int, optional
+        The number of threads running the checks. Default is the number
+        of checks, up to the number of CPUs.
+    options : dict, optional
+        The options of the checks, by name of check, e.g.
+        {'cycling_check': {'window': 120}}.
+
+    Returns
+    -------
+    list of CheckResult
+        The result of each check, in the order of `names`.
+
+    """
+
+    checks = [CHECKS[name] for name in (CHECKS if names is None else names)]
+    options = {} if options is None else options
+    # Compute all the quantities at once, sharing their common inputs
+    inputs = list(dict.fromkeys(name for c in checks for name in c.inputs))
+    values = dtk.get(' '.join(inputs)) if inputs else ()
+    quantities = dict(zip(inputs, (values,) if len(inputs) == 1 else values))
+
+    run = lambda c: c(dtk, quantities, **options.get(c.name, {}))
+    workers = min(workers or os.cpu_count() or 1, max(len(checks), 1))
+    if workers == 1:
+        return [run(c) for c in checks]
+    with ThreadPoolExecutor(workers) as executor:
+        return list(executor.map(run, checks))
+
+@check('wr ws', plot='(wr ws)')
+def humidity_check(dtk, wr, ws, window=60, threshold=0.02):
+    """
+    Check whether the humidity ratio is increasing, i.e. whether the
+    supply humidity ratio exceeds the return humidity ratio more than
+    `threshold` of the time (in any window of `window` samples).
+    """
+    mask = np.asarray(wr < ws)
+    if window is None:
+        overhum = mask.sum() / len(wr)
+        if not overhum > threshold:
+            return overhum, mask, None, []
+        message = ('The supply humidity ratio exceeds '
+                   f'the return humidity ratio {overhum:.1%} of the time.')
+        return overhum, mask, message, [slice(0, len(wr))]
+
+    overhum = Rolling(mask, window).mean()
+    worst = np.nanmax(overhum)
+    intervals = failing_intervals(overhum > threshold, window // 2)
+    message = None
+    if intervals:
+        duration = sum(i.stop - i.start for i in intervals) / len(wr)
+        message = ('The supply humidity ratio exceeds '
+                   f'the return humidity ratio up to {worst:.1%} '
+                   f'of the time, in {len(intervals)} interval(s) '
+                   f'covering {duration:.1%} of the test.')
+    return worst, mask, message, intervals
+
+def _isolated_stops(f, min_run):
+    """
+    Return the intervals (slices) where the compressor stops (i.e. its
+    frequency is not positive) between runs of at least `min_run`
+    samples, or the start or end of the file.
+    """
+    stops = failing_intervals(np.asarray(f.to('Hz').magnitude) <= 0)
+    if not stops:
+        return []
+    starts = np.array([s.start for s in stops], dtype=float)
+    ends = np.array([s.stop for s in stops], dtype=float)
+    run_before = starts - np.concatenate([[-np.inf], ends[:-1]])
+    run_after = np.concatenate([starts[1:], [np.inf]]) - ends
+    isolated = (run_before >= min_run) & (run_after >= min_run)
+    return [s for s, keep in zip(stops, isolated) if keep]
+
+@check('f')
+def cycling_check(dtk, f, window=60, threshold='100 Hz**2', min_run=60):
+    """
+    Check if there is cycling, i.e. whether the variance of the
+    frequency around its moving mean exceeds `threshold` (in any window
+    of `window` samples, or over the whole file if `window` is None, in
+    which case `f` must be the frequency of the whole file).
+
+    A stop of the compressor between runs of at least `min_run` samples
+    is a start-up or a shut-down rather than cycling: the samples whose
+    moving mean covers it are left out of the mask and of the windows.
+    """
     window_size = 15
-    f = dtk.get('f')
-    fmean = f.movmean(window_size)
-    interval = slice(window_size//2, -window_size//2)
-    variance = np.var(f[interval] - fmean[interval])
-    if variance > dtk.Q_('100 Hz**2'):
-        error(field, 'There appears to be cycling.')
+    threshold = dtk.Q_(threshold).to('Hz**2')
+    residuals = (f - f.rolling(window_size).mean()).to('Hz').magnitude
+    residuals = np.array(residuals, dtype=float)
+    for stop in _isolated_stops(f, min_run):
+        residuals[max(stop.start - window_size // 2, 0):
+                  stop.stop + window_size // 2] = np.nan
+    # Samples fluctuating by more than the threshold standard deviation
+    mask = np.abs(residuals) > np.sqrt(threshold.magnitude)
+    if window is None:
+        # The fluctuations around the moving mean, outside of the edges,
+        # are kept up to date when new rows are read. The tracker is fed
+        # with the given samples, since the checks run in threads that
+        # must not compute quantities
+        moving = dtk.track('f', f'movmean{window_size}',
+                           lambda: MovingMean(window_size), f)
+        variance = moving.residuals.std**2
+        if not variance > threshold:
+            return variance, mask, None, []
+        return (variance, mask, 'There appears to be cycling.',
+                [slice(0, len(f))])
+
+    variance = Rolling(residuals, window).var()
+    intervals = failing_intervals(variance > threshold.magnitude,
+                                  window // 2)
+    message = None
+    if intervals:
+        message = ('There appears to be cycling, '
+                   f'in {len(intervals)} interval(s).')
+    return dtk.Q_(np.nanmax(variance), 'Hz**2'), mask, message, intervals
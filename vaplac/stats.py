@@ -0,0 +1,353 @@
+"""
+This module provides statistical tools for Quantity objects, such as
+the RunningStats and MovingMean classes, to compute statistics of a
+quantity whose samples are received block by block, and the describe
+function, to compute the descriptive statistics of many channels at
+once.
+
+"""
+
+import numpy as np
+
+from .rolling import Rolling
+
+# Number of rows of a block processed at once by describe
+CHUNK_ROWS = 2**14
+
+class RunningStats():
+    """
+    Statistics of a quantity updated block by block, in constant memory.
+
+    The mean and variance are merged with the parallel algorithm of
+    Chan et al., which remains accurate over many blocks. NaN samples
+    are counted but otherwise ignored.
+
+    Several channels can be followed at once by giving 2-D blocks, with
+    one column per channel: the statistics are then arrays, with one
+    value per channel.
+
+    Attributes
+    ----------
+    count : int or ndarray
+        The number of (non-NaN) samples received.
+    nans : int or ndarray
+        The number of NaN samples received.
+
+    Example
+    -------
+    >>> stats = RunningStats()
+    >>> for Qcond in dtk.iter_chunks('Qcond'):
+    ...     stats.update(Qcond)
+    >>> stats.mean, stats.integral(step=60).to('kWh')
+
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.nans = 0
+        self._min = np.inf
+        self._max = -np.inf
+        self._mean = 0.
+        self._m2 = 0.
+        self._sum = 0.
+        self._template = None
+        self._channels = False
+
+    def __repr__(self):
+        if self._template is None:
+            return 'RunningStats(empty)'
+        if self._channels:
+            return f'RunningStats({self._min.size} channels)'
+        return (f'RunningStats(count={self.count}, min={self.min:.4g~P}, '
+                f'max={self.max:.4g~P}, mean={self.mean:.4g~P})')
+
+    def update(self, quantity):
+        """
+        Add the samples of a quantity to the statistics.
+
+        Parameters
+        ----------
+        quantity : xpint Quantity or array_like
+            A block of samples, whose units, property and label must be
+            those of the previous blocks, or a 2-D array with one column
+            per channel.
+
+        """
+
+        magnitude = np.asarray(getattr(quantity, 'magnitude', quantity),
+                               dtype=float)
+        if self._template is None:
+            self._template = quantity
+            self._channels = magnitude.ndim == 2
+        x = magnitude if self._channels else magnitude.reshape(-1, 1)
+        valid = ~np.isnan(x)
+        n = valid.sum(axis=0)
+        self.nans = self.nans + (len(x) - n if self._channels
+                                 else int(x.size - n[0]))
+        if len(x) == 0:
+            return
+        if not self._channels:
+            # A Python int, so that the count can be stored as JSON
+            n = int(n[0])
+            x = x[valid[:, 0], 0]
+            if n == 0:
+                return
+            valid = None
+        self._merge(x, valid, n)
+
+    def _merge(self, x, valid, n):
+        """Merge the statistics of the samples x (where valid)."""
+        if valid is None:
+            total = x.sum(axis=0)
+            mean = total / n
+            m2 = ((x - mean)**2).sum(axis=0)
+            low, high = x.min(axis=0), x.max(axis=0)
+        else:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                total = np.where(valid, x, 0.).sum(axis=0)
+                mean = np.where(n > 0, total / n, 0.)
+                m2 = np.where(valid, x - mean, 0.)
+                m2 = (m2 * m2).sum(axis=0)
+            # fmin and fmax ignore NaN
+            low, high = np.fmin.reduce(x, axis=0), np.fmax.reduce(x, axis=0)
+        delta = mean - self._mean
+        count = self.count + n
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self._m2 = self._m2 + np.where(
+                n > 0, m2 + delta**2 * self.count * n / count, 0.)
+            self._mean = self._mean + np.where(n > 0, delta * n / count, 0.)
+        self.count = count
+        self._min = np.fmin(self._min, low)
+        self._max = np.fmax(self._max, high)
+        self._sum = self._sum + total
+
+    def _quantity(self, magnitude):
+        """Return a Quantity with the attributes of the samples."""
+        q = self._template
+        if not hasattr(q, 'units'):
+            return magnitude
+        return q.__class__(magnitude, q.units, prop=q.prop, label=q.label)
+
+    def _statistic(self, value):
+        """Return a statistic, NaN if there are no samples."""
+        return self._quantity(np.where(self.count > 0, value, np.nan)
+                              if self._channels
+                              else value if self.count else np.nan)
+
+    @property
+    def min(self):
+        """Minimum value."""
+        return self._statistic(self._min)
+
+    @property
+    def max(self):
+        """Maximum value."""
+        return self._statistic(self._max)
+
+    @property
+    def mean(self):
+        """Mean value."""
+        return self._statistic(self._mean)
+
+    @property
+    def std(self):
+        """Standard deviation (population), in the units of the samples."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self._statistic(np.sqrt(self._m2 / self.count))
+
+    @property
+    def sum(self):
+        """Sum of the samples."""
+        return self._quantity(self._sum)
+
+    def integral(self, step=60):
+        """
+        Return the integral over time of the quantity, e.g. the energy
+        from a power.
+
+        Parameters
+        ----------
+        step : int or float, default 60
+            The timestep between each measurement in seconds.
+
+        """
+
+        q = self._template
+        return q.__class__(self._sum * step, q.units * q._REGISTRY.second)
+
+class Summary():
+    """
+    Descriptive statistics of a quantity, or of several channels (each
+    statistic being then an array).
+
+    Attributes
+    ----------
+    count : int or ndarray
+        The number of (non-NaN) samples.
+    nans : int or ndarray
+        The number of NaN samples.
+    min, max, mean, std : xpint Quantity, float or ndarray
+        The minimum, maximum, mean and standard deviation (population)
+        of the samples.
+    percentiles : dict
+        The requested percentiles, by percentage.
+    title : str
+        A title displayed above the statistics (e.g. the property of the
+        quantity).
+
+    """
+
+    def __init__(self, count, nans, min, max, mean, std, percentiles=None,
+                 title=None):
+        self.count = count
+        self.nans = nans
+        self.min = min
+        self.max = max
+        self.mean = mean
+        self.std = std
+        self.percentiles = {} if percentiles is None else percentiles
+        self.title = title
+
+    def __repr__(self):
+        if np.ndim(self.count):
+            return f'Summary({np.size(self.count)} channels)'
+
+        def fmt(q):
+            """Return the number to display."""
+            q_rd = round(q, 2)
+            magnitude = getattr(q, 'magnitude', q)
+            if magnitude == 0 or getattr(q_rd, 'magnitude', q_rd) != 0:
+                return str(q_rd)
+            return f'{q:.2e}'
+
+        rows = [('min:', self.min), ('max:', self.max),
+                ('mean:', self.mean), ('std:', self.std),
+                *((f'{p:g}%:', value)
+                  for p, value in self.percentiles.items())]
+        values = [fmt(value) for _, value in rows]
+        l = max(len(value) for value in values)
+        lines = [] if self.title is None else [self.title, '']
+        lines += [f'{name:<6}{value:>{l}}'
+                  for (name, _), value in zip(rows, values)]
+        lines.append(f'{"count:":<6}{self.count:>{l}}'
+                     + (f' ({self.nans} NaN)' if self.nans else ''))
+        return '\n'.join(lines)
+
+def describe(block, percentiles=None):
+    """
+    Compute the descriptive statistics of the columns of a 2-D array.
+
+    The block is read once, by chunks of CHUNK_ROWS rows, each chunk
+    being reduced for all the statistics while it is in the cache, and
+    merged with the previous ones (see RunningStats). Only the
+    percentiles need another pass.
+
+    Parameters
+    ----------
+    block : array_like
+        The samples, with one column per channel (or a 1-D array).
+    percentiles : iterable of float, optional
+        Percentages of the percentiles to compute, e.g. (5, 50, 95).
+
+    Returns
+    -------
+    Summary
+        The statistics, as arrays with one value per column (or as
+        floats for a 1-D array).
+
+    """
+
+    block = np.asarray(block, dtype=float)
+    x = block if block.ndim == 2 else block.reshape(-1, 1)
+    stats = RunningStats()
+    stats.update(x[:0])
+    for i in range(0, len(x), CHUNK_ROWS):
+        stats.update(x[i:i+CHUNK_ROWS])
+    values = {'count': stats.count, 'nans': stats.nans, 'min': stats.min,
+              'max': stats.max, 'mean': stats.mean, 'std': stats.std}
+    percentiles = {} if percentiles is None else {
+        p: np.nanpercentile(x, p, axis=0) if len(x) else np.full(x.shape[1],
+                                                                 np.nan)
+        for p in percentiles}
+    if block.ndim != 2:
+        # Scalar statistics
+        values = {name: value[0].item() for name, value in values.items()}
+        percentiles = {p: value[0].item() for p, value in percentiles.items()}
+    return Summary(**values, percentiles=percentiles)
+
+class MovingMean():
+    """
+    Centered moving mean of a quantity whose samples are received block
+    by block.
+
+    Only the samples whose whole window has been received are processed,
+    so that their moving mean is final: the edges of the quantity are
+    left out, and the last n-1 samples are kept until the next block
+    completes their window. The memory used is thus independent of the
+    number of samples. The means are computed by vaplac.rolling.Rolling,
+    NaN samples being left out of the windows.
+
+    Parameters
+    ----------
+    n : int
+        Size of the window. This value must be odd, otherwise it will be
+        incremented.
+
+    Attributes
+    ----------
+    residuals : RunningStats
+        The statistics of the samples minus their moving mean, e.g. to
+        detect fluctuations around a slowly varying value.
+
+    Example
+    -------
+    >>> moving = MovingMean(15)
+    >>> for f in dtk.iter_chunks('f'):
+    ...     fmean = moving.update(f)
+    >>> moving.residuals.std
+
+    """
+
+    def __init__(self, n):
+        self.n = n + 1 if n % 2 == 0 else n
+        self.residuals = RunningStats()
+        self._tail = np.empty(0)
+        self._template = None
+
+    def __repr__(self):
+        return f'MovingMean({self.n})'
+
+    def update(self, quantity):
+        """
+        Add the samples of a quantity.
+
+        Parameters
+        ----------
+        quantity : xpint Quantity
+            A block of samples, with the dimensionality of the previous
+            blocks.
+
+        Returns
+        -------
+        xpint Quantity
+            The moving mean of the samples whose window is completed by
+            this block (possibly none), in the units of the first block.
+
+        """
+
+        if self._template is None:
+            self._template = quantity
+        q = self._template
+        x = np.concatenate([self._tail,
+                            np.asarray(quantity.to(q.units).magnitude,
+                                       dtype=float).ravel()])
+        n, l = self.n, self.n // 2
+        if len(x) < n:
+            self._tail = x
+            return q.__class__(x[:0], q.units, prop=q.prop, label=q.label)
+        # The windows of the samples l to len(x)-l are complete
+        mean = Rolling(x, n).mean()[l:len(x)-l]
+        self.residuals.update(q.__class__(x[l:len(x)-l] - mean, q.units,
+                                          prop=q.prop, label=q.label))
+        self._tail = x[len(x)-n+1:]
+        return q.__class__(mean, q.units, prop=q.prop, label=q.label)
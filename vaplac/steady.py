@@ -0,0 +1,101 @@
+"""
+This module implements the detection of the steady-state periods of a
+test, over which the performances of the heat pump (e.g. its COP and
+capacity) are averaged.
+
+A sample is steady when, over the window centered on it, the standard
+deviation of each of the chosen channels remains below its tolerance
+(and the compressor runs over the whole window). The steady periods are
+the runs of steady samples lasting at least `min_length` samples. For
+windows given in samples, the runs are then extended by half a window
+on both sides, since the whole windows of their samples are steady.
+The rolling statistics of all the channels are computed in a single
+pass over the data.
+
+"""
+
+import numpy as np
+
+from .rolling import Rolling, intervals
+
+# Default channels and tolerances on their standard deviation
+TOLERANCES = {
+    'f': '1 Hz',
+    'Tr': '0.5 delta_degC',
+    'Ts': '0.5 delta_degC',
+    'pout': '50 kPa',
+    'Qcond': '0.3 kW',
+}
+
+def steady_segments(dtk, channels=None, window=30, tolerances=None,
+                    min_length=None, time=None, running=True):
+    """
+    Return the steady-state periods of the data of a DataTaker.
+
+    Parameters
+    ----------
+    dtk : DataTaker
+        The DataTaker whose data is analysed.
+    channels : str or iterable of str, optional
+        The quantities that must be steady (separated by spaces in a
+        string). Default is the channels of TOLERANCES: f, Tr, Ts, pout
+        and Qcond.
+    window : int, float, str or Quantity, default 30
+        The number of samples in the windows or, if `time` is given, their
+        duration (see vaplac.rolling.Rolling).
+    tolerances : dict, optional
+        The highest standard deviation of each channel over a window, as
+        a string or a Quantity (e.g. {'Tr': '0.2 delta_degC'}). The
+        channels missing are given the tolerance of TOLERANCES.
+    min_length : int, optional
+        The minimum number of steady samples of a steady period, before
+        it is extended by half a window on both sides. Default is the
+        number of samples of a window (if it is given as such).
+    time : array_like, optional
+        The time of each sample, for windows given as durations.
+    running : boolean, default True
+        If True, the compressor must run (f > 0) over the window of a
+        sample for it to be steady.
+
+    Returns
+    -------
+    list of slice
+        The steady periods, as slices of the samples.
+
+    """
+
+    if channels is None:
+        channels = list(TOLERANCES)
+    elif isinstance(channels, str):
+        channels = channels.split()
+    tolerances = {**TOLERANCES, **({} if tolerances is None else tolerances)}
+    missing = [channel for channel in channels if channel not in tolerances]
+    if missing:
+        raise ValueError(f'no tolerance given for {", ".join(missing)}')
+
+    names = channels + (['f'] if running and 'f' not in channels else [])
+    quantities = dtk.get(' '.join(names))
+    quantities = dict(zip(names, (quantities,) if len(names) == 1
+                          else quantities))
+
+    steady = True
+    for channel in channels:
+        std = Rolling(quantities[channel], window, time).std()
+        tolerance = dtk.Q_(tolerances[channel]).to(std.units)
+        # NaN values are never steady
+        steady = steady & (std.magnitude <= tolerance.magnitude)
+    if running:
+        # The compressor runs over the whole window
+        f = Rolling(quantities['f'], window, time).min()
+        steady = steady & (f.magnitude > 0)
+
+    if min_length is None:
+        min_length = window if time is None else 1
+    # Keep the long enough runs, before extending them
+    kept = np.zeros(len(steady), dtype=bool)
+    for run in intervals(steady):
+        if run.stop - run.start >= min_length:
+            kept[run] = True
+    # Samples of the windows before and after their center
+    margin = (int(window)//2, (int(window)-1)//2) if time is None else 0
+    return intervals(kept, margin)
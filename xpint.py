@@ -4,26 +4,139 @@ that is used to define a new Quantity class, in order to provide a few
 more attributes (see the Quantity class documentation).
 """
 import pint, pint.quantity
+from pint.util import to_units_container
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
 import warnings
 
 
+# Number of samples above which plots are decimated by default
+DECIMATION_THRESHOLD = 10000
+
+def minmax_indices(y, n_bins):
+    """
+    Return the indices of the samples kept to draw y with n_bins bins.
+
+    The samples are split into n_bins bins of consecutive samples, and
+    the minimum and maximum of each bin are kept, along with the first
+    and last samples and the first NaN of each bin (so that the gaps in
+    the data remain visible). At one bin per pixel, the drawn line is
+    the same as with all the samples: the peaks are kept.
+
+    Parameters
+    ----------
+    y : array_like
+        The samples.
+    n_bins : int
+        The number of bins, e.g. the width of the axis in pixels.
+
+    Returns
+    -------
+    ndarray
+        The sorted indices of the samples kept.
+
+    """
+
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= 2 * n_bins:
+        return np.arange(n)
+    size = -(-n // n_bins)  # samples per bin
+    # Pad with NaN to fill the last bin
+    bins = np.pad(y, (0, -n % size), constant_values=np.nan).reshape(-1, size)
+    nan = np.isnan(bins)
+    offsets = np.arange(len(bins)) * size
+    indices = np.concatenate([
+        offsets + np.where(nan, np.inf, bins).argmin(axis=1),
+        offsets + np.where(nan, -np.inf, bins).argmax(axis=1),
+        (offsets + nan.argmax(axis=1))[nan.any(axis=1)],
+        [0, n - 1]])
+    return np.unique(indices[indices < n])
+
+def _axis_values(x):
+    """Return abscissas in the units of the limits of a matplotlib axis."""
+    import matplotlib.dates as mdates
+
+    x = np.asarray(x)
+    return x.astype(float) if x.dtype.kind in 'biuf' else mdates.date2num(x)
+
+class DecimatedLine():
+    """
+    Line of a matplotlib axis drawing the samples of y (versus x) with
+    min/max decimation, recomputed for the visible range of x whenever
+    the limits of the axis change (zoom and pan).
+
+    Parameters
+    ----------
+    ax : matplotlib Axes
+        The axis in which the line is drawn.
+    x : array_like
+        The abscissas, in increasing order (numbers or datetimes).
+    y : array_like
+        The samples.
+    **kwargs
+        Keyword arguments passed to `ax.plot`.
+
+    Attributes
+    ----------
+    line : matplotlib Line2D
+        The line drawn.
+
+    """
+
+    def __init__(self, ax, x, y, **kwargs):
+        self.ax = ax
+        self.x, self.y = np.asarray(x), np.asarray(y, dtype=float)
+        self._xlim = _axis_values(self.x)
+        self.line, = ax.plot(*self._decimate(), **kwargs)
+        # A function (rather than a bound method) keeps the line alive
+        ax.callbacks.connect('xlim_changed', lambda ax: self.update())
+
+    def _decimate(self, xlim=None):
+        """Return the decimated samples in the range xlim."""
+        start, stop = 0, len(self.y)
+        if xlim is not None:
+            # Keep one sample on each side to draw the line to the edges
+            start = max(np.searchsorted(self._xlim, min(xlim)) - 1, 0)
+            stop = min(np.searchsorted(self._xlim, max(xlim)) + 1, stop)
+        n_bins = max(int(self.ax.get_window_extent().width), 100)
+        indices = start + minmax_indices(self.y[start:stop], n_bins)
+        return self.x[indices], self.y[indices]
+
+    def update(self):
+        """Recompute the line for the current limits of the axis."""
+        self.line.set_data(*self._decimate(self.ax.get_xlim()))
+
+def plot_line(ax, x, y, decimate=None, **kwargs):
+    """
+    Plot y versus x in an axis, with decimation if `decimate` is True,
+    or if it is None and there are more than DECIMATION_THRESHOLD
+    samples. Keyword arguments are passed to `ax.plot`.
+
+    Samples whose abscissas are not sorted are never decimated, since
+    the visible range could not be located.
+    """
+    if decimate or decimate is None and len(y) > DECIMATION_THRESHOLD:
+        if np.all(np.diff(_axis_values(x)) >= 0):
+            return DecimatedLine(ax, x, y, **kwargs).line
+    return ax.plot(x, y, **kwargs)[0]
+
+
 class UnitRegistry(pint.registry.UnitRegistry):
     """
     Defines the Registry, a class to contains units and their relations.
 
     This is a subclass of pint.registry.UnitRegistry, whose only purpose
     is to build a custom Quantity class. A UnitRegistry is necessary to
-    create Quantity objects.
+    create Quantity objects. The Quantity class subclasses
+    `quantity_base`, by default _Quantity, which can be replaced by a
+    subclass of _Quantity providing more methods.
     """
 
     def __init__(self, filename='', force_ndarray=False,
                  default_as_delta=True,
                  autoconvert_offset_to_baseunit=False,
                  on_redefinition='warn', system=None,
-                 auto_reduce_dimensions=False):
+                 auto_reduce_dimensions=False, quantity_base=None):
 
         # Inherit as in the parent UnitRegistry class
         super(UnitRegistry, self).__init__(
@@ -37,7 +150,8 @@ class UnitRegistry(pint.registry.UnitRegistry):
         )
 
         # Build Quantity from the _Quantity class
-        self.Quantity = build_quantity_class(self, force_ndarray)
+        self.Quantity = build_quantity_class(self, force_ndarray,
+                                             quantity_base)
 
 
 class _Quantity(pint.quantity._Quantity):
@@ -51,15 +165,130 @@ class _Quantity(pint.quantity._Quantity):
         self.label=label
         return self
 
-    def to(self, other=None, *contexts, **ctx_kwargs):
-        """Keep the values of `prop` and `label` after a conversion."""
+    def to(self, other=None, *contexts, inplace=False, **ctx_kwargs):
+        """
+        Return the quantity converted to other units, keeping the values
+        of `prop` and `label`.
+
+        The factor and offset of each conversion are computed once per
+        pair of units, then reused. When the units are unchanged, the
+        returned quantity shares the magnitude of this one.
+
+        Parameters
+        ----------
+        other : str, Unit or Quantity, optional
+            The units to convert to. If None is given, the quantity is
+            returned without conversion.
+        inplace : boolean, default False
+            If set to True, the quantity itself is converted and
+            returned, its magnitude being overwritten when it is an
+            array of floats.
+
+        """
+
         if other is None:
-            return self.__class__(self.magnitude, units=self.units,
-                                  prop=self.prop, label=self.label)
-        else:
+            return self if inplace else self.__class__(
+                self._magnitude, self._units, prop=self.prop,
+                label=self.label
+            )
+        if contexts or ctx_kwargs:
             quantity = super().to(other, *contexts, **ctx_kwargs)
-            return self.__class__(quantity.magnitude, units=quantity.units,
-                                  prop=self.prop, label=self.label)
+            units, magnitude = quantity._units, quantity._magnitude
+        else:
+            units, factor, offset = self._conversion(other)
+            magnitude = self._magnitude
+            if factor == 1 and offset == 0:
+                pass
+            elif (inplace and isinstance(magnitude, np.ndarray)
+                  and magnitude.dtype.kind == 'f'
+                  and magnitude.flags.writeable):
+                np.multiply(magnitude, factor, out=magnitude)
+                if offset:
+                    np.add(magnitude, offset, out=magnitude)
+            else:
+                magnitude = magnitude * factor + offset if offset \
+                    else magnitude * factor
+        if inplace:
+            self._magnitude, self._units = magnitude, units
+            return self
+        return self.__class__(magnitude, units, prop=self.prop,
+                              label=self.label)
+
+    def _conversion(self, other):
+        """
+        Return the units to convert to, with the factor and offset of
+        the conversion from the units of the quantity.
+        """
+        key = (self._units, other if isinstance(other, str)
+               else to_units_container(other))
+        if key not in self._conversions:
+            registry = self._REGISTRY
+            units = to_units_container(other, registry)
+            offset = registry.convert(0., self._units, units)
+            # The factor of a conversion with an offset (e.g. between
+            # temperatures) is taken on a large interval, to keep it
+            # exact in floating point arithmetic
+            factor = (registry.convert(1., self._units, units) if offset == 0
+                      else (registry.convert(1e6, self._units, units)
+                            - offset) / 1e6)
+            self._conversions[key] = (units, factor, offset)
+        return self._conversions[key]
+
+    def ito(self, other=None, *contexts, **ctx_kwargs):
+        """Convert the quantity to other units, in place."""
+        self.to(other, *contexts, inplace=True, **ctx_kwargs)
+
+    def __getitem__(self, key):
+        """Keep the values of `prop` and `label` in a slice."""
+        quantity = super().__getitem__(key)
+        quantity.prop, quantity.label = self.prop, self.label
+        return quantity
+
+    def readonly(self):
+        """
+        Return a read-only view of the quantity.
+
+        The magnitude is shared with this quantity but cannot be
+        modified through the view. Modifying the view in place (e.g.
+        with item assignment or +=) first gives it its own copy of the
+        magnitude (copy-on-write).
+        """
+        magnitude = self._magnitude
+        if isinstance(magnitude, np.ndarray):
+            magnitude = magnitude.view()
+            magnitude.flags.writeable = False
+        return self.__class__(magnitude, self._units, prop=self.prop,
+                              label=self.label)
+
+    def _writeable(self):
+        """Copy the magnitude if it is a read-only array."""
+        magnitude = self._magnitude
+        if isinstance(magnitude, np.ndarray) and not magnitude.flags.writeable:
+            self._magnitude = magnitude.copy()
+
+    def __setitem__(self, key, value):
+        self._writeable()
+        super().__setitem__(key, value)
+
+    def __iadd__(self, other):
+        self._writeable()
+        return super().__iadd__(other)
+
+    def __isub__(self, other):
+        self._writeable()
+        return super().__isub__(other)
+
+    def __imul__(self, other):
+        self._writeable()
+        return super().__imul__(other)
+
+    def __itruediv__(self, other):
+        self._writeable()
+        return super().__itruediv__(other)
+
+    def __ipow__(self, other):
+        self._writeable()
+        return super().__ipow__(other)
 
     def name(self, prop=None, label=None):
         """Shortcut to set `prop` and `label` attributes on one line"""
@@ -68,16 +297,19 @@ class _Quantity(pint.quantity._Quantity):
 
 
     def clean(self):
-        """Replace UnderRange values by zero and divide by two."""
-        if self.magnitude.dtype != 'O':
-            raise Exception(('This function only applies to a Quantity'
-                             ' whose magnitude dtype is \'O\''))
-        self[self.magnitude == 'UnderRange'] = self.__class__(0, 'Hz')
-        return self.__class__(self.astype(float)/2, units=self.units,
-                              prop=self.prop, label=self.label)
+        """Replace missing (NaN) values by zero and divide by two."""
+        magnitude = np.asarray(self.magnitude, dtype=float)
+        return self.__class__(np.where(np.isnan(magnitude), 0, magnitude)/2,
+                              units=self.units, prop=self.prop,
+                              label=self.label)
 
     def info(self, index=slice(0, None)):
-        """Display the min, max and mean values of the quantity."""
+        """
+        Display the min, max and mean values of the quantity.
+
+        The quantities of vaplac also provide the standard deviation,
+        percentiles and the number of NaN values (see vaplac.quantity).
+        """
         # Specify the property
         if self.dimensionless:
             if self.prop is None:
@@ -101,9 +333,10 @@ class _Quantity(pint.quantity._Quantity):
                 return len(f'{q:.2e} '), f'{q:.2e} '
 
         # Get the length and values
-        l_min, v_min = fmt(self.min())
-        l_max, v_max = fmt(self.max())
-        l_avg, v_avg = fmt(self.mean())
+        q = self[index]
+        l_min, v_min = fmt(q.min())
+        l_max, v_max = fmt(q.max())
+        l_avg, v_avg = fmt(q.mean())
         l = max(l_min, l_max, l_avg)
 
         # and print 'em
@@ -111,7 +344,8 @@ class _Quantity(pint.quantity._Quantity):
         print('max: ' + ' '*(l-l_max), v_max)
         print('mean:' + ' '*(l-l_avg), v_avg)
 
-    def plot(self, time='min', step=60, interval=slice(0, None)):
+    def plot(self, time='min', step=60, interval=slice(0, None),
+             decimate=None):
         """
         Plot the quantity versus time.
 
@@ -129,17 +363,27 @@ class _Quantity(pint.quantity._Quantity):
         interval : slice, default slice(0, None)
             A slice object containing the range over which the
             quantities are plotted.
+        decimate : bool, optional
+            If True, only the minimum and maximum of the samples falling
+            within each pixel are drawn, and they are recomputed when
+            zooming or panning, so that long series are drawn quickly
+            while their peaks remain visible. By default, decimation is
+            used above DECIMATION_THRESHOLD samples.
         """
 
+        import matplotlib.pyplot as plt
+        import matplotlib.dates as mdates
+
         # Disable pint's annoying UnitStrippedWarning warnings
         warnings.simplefilter('ignore')
 
         res = {'s':1/step, 'min':60/step, 'h':3600/step, 'days':86400/step}
         t_str = isinstance(time, str)
-        t = np.arange(0, len(self)) / res[time] if t_str else time[interval]
+        t = (np.arange(0, len(self))[interval] / res[time] if t_str
+             else time[interval])
 
         _, ax = plt.subplots()
-        ax.plot(t, self[interval])
+        plot_line(ax, t, self[interval].magnitude, decimate)
 
         # Set x-label
         x_label = 'time (' + (time if t_str else 'timestamp') + ')'
@@ -224,10 +468,13 @@ class _Quantity(pint.quantity._Quantity):
         return self.__class__(movsum / n, self.units,
                               label=self.label, prop=self.prop)
 
-def build_quantity_class(registry, force_ndarray=False):
-    """Build a Quantity class from a registry, subclassing _Quantity"""
+def build_quantity_class(registry, force_ndarray=False, base=None):
+    """
+    Build a Quantity class from a registry, subclassing `base` (by
+    default _Quantity).
+    """
 
-    class Quantity(_Quantity):
+    class Quantity(_Quantity if base is None else base):
         """
         Phyiscal quantity (the product of a numerical value and a unit
         of measurement) with additional info that is not available in pint.
@@ -269,5 +516,7 @@ def build_quantity_class(registry, force_ndarray=False):
 
     Quantity._REGISTRY = registry
     Quantity.force_ndarray = force_ndarray
+    # Conversions between units, keyed by (units, target units)
+    Quantity._conversions = {}
 
     return Quantity